@@ -1,22 +1,37 @@
 #!/usr/bin/env python3
 import os
 import sys
-import shutil
 import hashlib
+import mmap
 import datetime
 import time
 import json
+import sqlite3
+import io
+import re
+import struct
 import exifread
 import http.server
 import socketserver
 import threading
+import queue
 import webbrowser
 import platform
+import signal
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor
-import queue
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future, as_completed
 import argparse # <-- Added for argument parsing
 import socket
+import functools
+import itertools
+import errno
+import gzip
+import mimetypes
+import stat
+import importlib.util
+import contextlib
+import ctypes
+from collections import deque, OrderedDict, namedtuple
 
 # --- Early Dependency Check ---
 try:
@@ -35,6 +50,41 @@ except ImportError:
         sys.exit(1)
 # --- End Dependency Check ---
 
+import numpy as np # Installed alongside reverse_geocoder
+
+# Optional: BLAKE3 is a SIMD, multi-threaded hash several times faster than SHA-256
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+# Name stored alongside cached digests so a run with a different hash never trusts them
+HASH_NAME = 'blake3' if blake3 is not None else 'sha256'
+
+
+def new_hasher():
+    """A fresh hasher for HASH_NAME."""
+    return blake3.blake3(max_threads=2) if blake3 is not None else hashlib.sha256()
+
+# Optional: orjson encodes straight to bytes, several times faster than json for the UI endpoints
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def json_bytes(obj):
+    """Encode obj as UTF-8 JSON bytes for an HTTP response."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode('utf-8')
+
+
+def json_from_bytes(data):
+    """Decode a JSON request body (raises json.JSONDecodeError, which orjson's error subclasses)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data.decode('utf-8'))
+
 
 def is_connected(host="8.8.8.8", port=53, timeout=3):
     """
@@ -55,22 +105,36 @@ def is_connected(host="8.8.8.8", port=53, timeout=3):
 # 1. Simple config load/save functions
 # -----------------------------------------------------------
 CONFIG_FILE = 'last_folders.json'
+LOCATION_CACHE_FILE = 'location_cache.json'
+FILE_CACHE_FILE = 'file_cache.sqlite'
+# Rows for files not seen in this many days are dropped when the file cache is opened
+FILE_CACHE_MAX_AGE_DAYS = 180
 
 def get_config_path():
     """Gets the absolute path to the config file."""
     return os.path.join(os.path.dirname(os.path.abspath(__file__)), CONFIG_FILE)
 
+def get_location_cache_path():
+    """Gets the absolute path to the online geocoding cache (next to the config file)."""
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), LOCATION_CACHE_FILE)
+
+def get_file_cache_path():
+    """Gets the absolute path to the per-file metadata cache (next to the config file)."""
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), FILE_CACHE_FILE)
+
 def load_config():
     """
     Reads last-used folders from 'last_folders.json'.
     Returns a dictionary with 'source', 'destinations', 'append_location', 'folder_suffix'.
     """
+    global _saved_config_text
     config_path = get_config_path()
     if os.path.exists(config_path):
         try:
             with open(config_path, 'r', encoding='utf-8') as f:
                 # Ensure default keys exist
                 config = json.load(f)
+                _saved_config_text = json.dumps(config, indent=4) # What's on disk right now
                 config.setdefault("source", "")
                 config.setdefault("destinations", [])
                 config.setdefault("append_location", True)
@@ -83,16 +147,499 @@ def load_config():
             return {"source": "", "destinations": [], "append_location": True, "folder_suffix": ""}
     return {"source": "", "destinations": [], "append_location": True, "folder_suffix": ""}
 
+# Serialized form of the config last read or written, so unchanged saves skip the disk entirely
+_saved_config_text = None
+_config_lock = threading.Lock() # UI requests can save concurrently
+
 def save_config(config):
     """
     Writes the config dictionary to 'last_folders.json'.
+    Skipped when nothing changed; otherwise written to a temp file and swapped in atomically.
     """
+    global _saved_config_text
     config_path = get_config_path()
+    text = json.dumps(config, indent=4) # Added indent for readability
+    with _config_lock:
+        if text == _saved_config_text:
+            return
+        tmp_path = config_path + ".tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(tmp_path, config_path) # Never leaves a half-written config behind
+            _saved_config_text = text
+        except IOError as e:
+            print(f"Error saving config file {config_path}: {e}")
+
+def load_location_cache():
+    """
+    Reads online geocoding results saved by previous runs.
+    Returns a dictionary keyed by rounded (lat, lon) tuples.
+    """
+    cache_path = get_location_cache_path()
+    if not os.path.exists(cache_path):
+        return {}
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            # JSON keys are "lat,lon" strings
+            return {tuple(float(v) for v in key.split(',')): name for key, name in json.load(f).items()}
+    except (json.JSONDecodeError, ValueError, IOError) as e:
+        print(f"Warning: Location cache {cache_path} is unreadable ({e}). Starting with an empty cache.")
+        return {}
+
+def save_location_cache(cache):
+    """
+    Writes online geocoding results to 'location_cache.json' so later runs skip those HTTP calls.
+    """
+    cache_path = get_location_cache_path()
     try:
-        with open(config_path, 'w', encoding='utf-8') as f:
-            json.dump(config, f, indent=4) # Added indent for readability
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump({f"{lat},{lon}": name for (lat, lon), name in cache.items()}, f, indent=1)
     except IOError as e:
-        print(f"Error saving config file {config_path}: {e}")
+        print(f"Error saving location cache {cache_path}: {e}")
+
+
+class FileCache:
+    """Hash, folder date and GPS per file, kept across runs in SQLite.
+       Rows are keyed by path and only trusted while the file's mtime and size still match."""
+
+    def __init__(self, db_path):
+        self._lock = threading.Lock() # One connection shared by all worker threads
+        self._seen = set()
+        self._conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS file_cache (
+            path TEXT PRIMARY KEY, mtime INTEGER, size INTEGER,
+            hash TEXT, date TEXT, lat REAL, lon REAL, seen REAL)""")
+        # Evict rows for files (old cards, deleted backups) we haven't come across in a long time
+        self._conn.execute("DELETE FROM file_cache WHERE seen < ?", (time.time() - FILE_CACHE_MAX_AGE_DAYS * 86400,))
+
+    def get(self, path, st):
+        """Cached fields for path as a dict, or None if missing or the file changed since."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT hash, date, lat, lon FROM file_cache WHERE path = ? AND mtime = ? AND size = ?",
+                (path, st.st_mtime_ns, st.st_size)).fetchone()
+            if row is None:
+                return None
+            self._seen.add(path)
+        return {"hash": row[0], "date": row[1], "lat": row[2], "lon": row[3]}
+
+    def put(self, path, st, **fields):
+        """Store fields for path. Other cached fields are kept if the file is unchanged, dropped otherwise."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT hash, date, lat, lon FROM file_cache WHERE path = ? AND mtime = ? AND size = ?",
+                (path, st.st_mtime_ns, st.st_size)).fetchone()
+            merged = dict(zip(("hash", "date", "lat", "lon"), row or (None,) * 4))
+            merged.update(fields)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO file_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, st.st_mtime_ns, st.st_size, merged["hash"], merged["date"], merged["lat"], merged["lon"], time.time()))
+            self._seen.discard(path) # seen was just written
+
+    def forget(self, path):
+        """Drop the cached row for path (its content changed under an unchanged mtime/size)."""
+        with self._lock:
+            self._conn.execute("DELETE FROM file_cache WHERE path = ?", (path,))
+            self._seen.discard(path)
+
+    def close(self):
+        """Mark rows read this run as recently seen and close the database."""
+        with self._lock:
+            try:
+                now = time.time()
+                with self._conn: # One transaction for the whole batch
+                    self._conn.executemany("UPDATE file_cache SET seen = ? WHERE path = ?", ((now, p) for p in self._seen))
+            finally:
+                self._seen.clear()
+                self._conn.close()
+
+def open_file_cache():
+    """Opens the persistent file cache, or returns None (caching disabled) if it can't be used."""
+    cache_path = get_file_cache_path()
+    try:
+        return FileCache(cache_path)
+    except sqlite3.Error as e:
+        print(f"Warning: File cache {cache_path} is unusable ({e}). Continuing without it.")
+        return None
+
+
+# EXIF/APP1 data lives at the head of the file, so only this many bytes are
+# handed to exifread first; the full file is parsed only if that comes up short.
+EXIF_HEAD_BYTES = 128 * 1024
+
+# Tag exifread stops at. IFD0's sub-IFD pointers are followed in tag order, so the EXIF IFD
+# (0x8769) is read before the GPS IFD (0x8825); GPS still comes through only because
+# stop_tag ends just the sub-IFD it is found in, so stopping at DateTimeOriginal skips the
+# rest of the EXIF IFD and then goes on to read GPS.
+EXIF_STOP_TAG = 'DateTimeOriginal'
+
+# EXIF date tags in order of preference, and the YYYY:MM:DD / YYYY-MM-DD prefix they start with
+_DATE_TAGS = ('EXIF DateTimeOriginal', 'Image DateTime', 'EXIF DateTimeDigitized')
+_DATE_RE = re.compile(r'(\d{4})[:\-](\d{2})[:\-](\d{2})')
+
+# Anything but letters, digits, '_', ' ' and '-' is dropped from folder names
+# (\w is exactly str.isalnum() plus '_', so accented and non-Latin place names survive)
+_UNSAFE_FOLDER_CHARS_RE = re.compile(r'[^\w \-]')
+
+@functools.lru_cache(maxsize=1024)
+def _safe_folder_part(name):
+    """Sanitize a location name or suffix for file systems (memoized: a run repeats a handful of names)."""
+    return _UNSAFE_FOLDER_CHARS_RE.sub('', name).strip()
+
+# Seconds between status refreshes (UI status dict and CLI progress bar)
+STATUS_INTERVAL = 0.25
+
+# Threads listing source directories concurrently (more barely helps on one card/volume)
+SCAN_WORKERS = 4
+
+# Worker processes parsing EXIF (exifread is pure Python, so threads serialize on the GIL);
+# each costs ~20 MB, and an SD card can't feed more than a handful anyway
+META_PROCESSES = min(8, os.cpu_count() or 1)
+
+# Directory entries classified (and handed to the copy stage) per scandir batch
+SCAN_BATCH = 256
+
+# Copy workers per destination drive: a couple of concurrent writes keeps a device busy
+# without the seek thrash of many threads fighting over one volume
+IO_WORKERS = 2
+# Files allowed in flight (EXIF parsed but not yet copied) at once
+MAX_IN_FLIGHT = 16
+
+# Decimal places GPS coordinates are rounded to when keying location lookups (~110 m)
+COORD_PRECISION = 3
+
+# Nominatim's usage policy allows at most one request per second: this is the gap kept between them
+NOMINATIM_MIN_INTERVAL = 1.0
+
+# Bytes compared at each end of a same-size target before committing to a full-file hash
+SAMPLE_BYTES = 64 * 1024
+# Below this size mmap setup costs more than a plain read when hashing
+MMAP_MIN_BYTES = 1024 * 1024
+# Destination mtimes within this of the source count as unchanged (FAT/exFAT store 2 s steps)
+MTIME_TOLERANCE_NS = 2 * 1000**3
+
+# Extensions (without the dot) of files picked up from the source card; one set lookup per name
+IMAGE_EXTENSIONS = frozenset({'jpg', 'jpeg', 'png', 'gif', 'tiff', 'tif', 'bmp', 'heic', 'heif',
+                              'arw', 'cr2', 'nef', 'dng', 'orf', 'rw2', 'pef', 'srw'})
+
+# --- Linux statx for the source scan ---
+# Ask only for the fields the backup uses, and with AT_STATX_DONT_SYNC let the kernel answer
+# from cached metadata instead of revalidating (matters on freshly mounted cards/network shares).
+AT_FDCWD = -100
+AT_STATX_DONT_SYNC = 0x4000
+STATX_NEEDED = 0x1 | 0x20 | 0x40 | 0x200 # TYPE | ATIME | MTIME | SIZE
+
+class _StatxTimestamp(ctypes.Structure):
+    _fields_ = [("tv_sec", ctypes.c_int64), ("tv_nsec", ctypes.c_uint32), ("_reserved", ctypes.c_int32)]
+
+class _Statx(ctypes.Structure):
+    _fields_ = [("stx_mask", ctypes.c_uint32), ("stx_blksize", ctypes.c_uint32),
+                ("stx_attributes", ctypes.c_uint64), ("stx_nlink", ctypes.c_uint32),
+                ("stx_uid", ctypes.c_uint32), ("stx_gid", ctypes.c_uint32),
+                ("stx_mode", ctypes.c_uint16), ("_spare0", ctypes.c_uint16),
+                ("stx_ino", ctypes.c_uint64), ("stx_size", ctypes.c_uint64),
+                ("stx_blocks", ctypes.c_uint64), ("stx_attributes_mask", ctypes.c_uint64),
+                ("stx_atime", _StatxTimestamp), ("stx_btime", _StatxTimestamp),
+                ("stx_ctime", _StatxTimestamp), ("stx_mtime", _StatxTimestamp),
+                ("_spare", ctypes.c_uint64 * 16)] # Rest of the 256-byte struct
+
+# The subset of os.stat_result the backup reads (size for totals, times for the copies/file cache)
+ScanStat = namedtuple('ScanStat', 'st_size st_atime_ns st_mtime_ns')
+
+@functools.lru_cache(maxsize=None)
+def _statx_fn():
+    """libc's statx (glibc 2.28+), or None where unavailable. Probed once."""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        fn = ctypes.CDLL(None, use_errno=True).statx
+    except (OSError, AttributeError):
+        return None
+    fn.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_uint, ctypes.POINTER(_Statx)]
+    fn.restype = ctypes.c_int
+    return fn
+
+def _scan_stat(entry):
+    """Stat a scanned DirEntry via statx where possible, else DirEntry.stat()."""
+    fn = _statx_fn()
+    if fn is not None:
+        buf = _Statx()
+        if (fn(AT_FDCWD, os.fsencode(entry.path), AT_STATX_DONT_SYNC, STATX_NEEDED, ctypes.byref(buf)) == 0
+                and buf.stx_mask & STATX_NEEDED == STATX_NEEDED):
+            return ScanStat(buf.stx_size,
+                            buf.stx_atime.tv_sec * 1_000_000_000 + buf.stx_atime.tv_nsec,
+                            buf.stx_mtime.tv_sec * 1_000_000_000 + buf.stx_mtime.tv_nsec)
+    return entry.stat()
+
+# Extensions that can carry EXIF; anything else (GIF, BMP, ...) skips the parse and dates from mtime
+EXIF_EXTS = frozenset({'.jpg', '.jpeg', '.tif', '.tiff', '.heic', '.heif', '.png',
+                       '.dng', '.cr2', '.cr3', '.nef', '.arw', '.rw2', '.orf', '.pef', '.srw'})
+
+
+# In-memory cache sizes; the file cache covers anything evicted on the next run
+HASH_CACHE_SIZE = 20000
+DATE_CACHE_SIZE = 20000
+EXIF_CACHE_SIZE = 5000 # Parsed tag dicts are the bulkiest entries
+
+
+class LRUCache:
+    """Small thread-safe mapping that drops the least recently used entry past maxsize."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return default
+            return self._data[key]
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class StatusDict(dict):
+    """The status dict, with a version number that moves only when a value actually changes,
+       so the /status endpoint can answer unchanged polls with 304 Not Modified."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock() # Writers (backup threads) vs. snapshot readers (server threads)
+        self.version = 0
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            if key not in self or self[key] != value:
+                super().__setitem__(key, value)
+                self.version += 1
+
+    def update(self, *args, **kwargs):
+        with self._lock:
+            changes = {k: v for k, v in dict(*args, **kwargs).items() if k not in self or self[k] != v}
+            if changes:
+                super().update(changes)
+                self.version += 1
+
+    def snapshot(self):
+        """(version, plain dict copy) taken atomically, so the pair always agree."""
+        with self._lock:
+            return self.version, dict(self)
+
+
+class SharedSource:
+    """One read-only descriptor for a source image, shared by its copies to every destination.
+       Opened on first use and closed when the last of `users` destinations releases it."""
+
+    def __init__(self, path, users):
+        self.path = path
+        self._users = users
+        self._fd = None
+        self._buffer = None
+        self._lock = threading.Lock()
+
+    def _open(self):
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_RDONLY)
+            if hasattr(os, "posix_fadvise"): # Linux/BSD only
+                # Read front to back once: ask for aggressive readahead
+                try:
+                    os.posix_fadvise(self._fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                except OSError:
+                    pass # Only a hint
+        return self._fd
+
+    def fileno(self):
+        with self._lock:
+            return self._open()
+
+    def buffer(self):
+        """The whole file contents, read from the card once and shared by all destinations
+           (mapped rather than copied into the heap for large files)."""
+        with self._lock:
+            if self._buffer is None:
+                fd = self._open()
+                size = os.fstat(fd).st_size
+                if size >= MMAP_MIN_BYTES:
+                    self._buffer = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+                else:
+                    with open(fd, 'rb', buffering=0, closefd=False) as f:
+                        self._buffer = f.read()
+            return self._buffer
+
+    def release(self):
+        with self._lock:
+            self._users -= 1
+            if self._users == 0:
+                if isinstance(self._buffer, mmap.mmap):
+                    self._buffer.close()
+                self._buffer = None
+                if self._fd is not None:
+                    if hasattr(os, "posix_fadvise"):
+                        # Every destination has it: drop the card's pages instead of letting
+                        # gigabytes of photos push useful data out of the page cache
+                        try:
+                            os.posix_fadvise(self._fd, 0, 0, os.POSIX_FADV_DONTNEED)
+                        except OSError:
+                            pass
+                    os.close(self._fd)
+                    self._fd = None
+
+
+# In-kernel copy primitives, best first, as fn(src_fd, dst_fd, offset, count) -> bytes copied.
+# All take explicit source offsets, so destinations sharing one source descriptor never
+# move each other's file position.
+KERNEL_COPIES = []
+if hasattr(os, "copy_file_range"):
+    # Linux 4.5+: server-side copy on NFS/SMB, reflink (O(1)) on btrfs/XFS
+    KERNEL_COPIES.append(lambda src_fd, dst_fd, offset, count: os.copy_file_range(src_fd, dst_fd, count, offset, offset))
+if hasattr(os, "sendfile"):
+    KERNEL_COPIES.append(lambda src_fd, dst_fd, offset, count: os.sendfile(dst_fd, src_fd, offset, count))
+KERNEL_COPY_CHUNK = 8 * 1024 * 1024 # Per call, so huge files stay interruptible
+# "This primitive can't do this pair of files": try the next one
+_NO_KERNEL_COPY = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.ENOTSUP, errno.EOPNOTSUPP,
+                   errno.ENOTSOCK, errno.EBADF, errno.EPERM}
+
+
+def _kernel_copy(copy_fn, src_fd, dst_fd, size):
+    """Copy `size` bytes with copy_fn. False if it's unsupported here (before any byte moved);
+       raises if the copy comes up short."""
+    offset = 0
+    while offset < size:
+        try:
+            copied = copy_fn(src_fd, dst_fd, offset, min(size - offset, KERNEL_COPY_CHUNK))
+        except OSError as e:
+            if offset == 0 and e.errno in _NO_KERNEL_COPY:
+                return False
+            raise
+        if copied == 0:
+            if offset == 0:
+                # copy_file_range returns 0 without copying on some filesystems (FUSE, network,
+                # some cross-device pairs): not a fast copy, let the next way do it (as shutil does)
+                return False
+            raise OSError(errno.EIO, f"Copy stopped at byte {offset} of {size} (source got shorter?)")
+        offset += copied
+    if offset != size:
+        raise OSError(errno.EIO, f"Copied {offset} bytes, expected {size}")
+    return True
+
+
+def copy_from_source(source, target_path, size, hasher=None):
+    """Write `size` bytes of a SharedSource into target_path (created/truncated), fastest way first:
+       copy_file_range, then sendfile, then a userspace copy (macOS, Windows, or filesystem pairs
+       the kernel won't copy between). After the first destination pulls the file off the card,
+       the rest are served from the page cache or the shared buffer: one card read.
+       A userspace copy also feeds every byte to `hasher`; returns True if it did."""
+    dst_fd = os.open(target_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o644)
+    try:
+        if KERNEL_COPIES:
+            src_fd = source.fileno()
+            for copy_fn in KERNEL_COPIES:
+                if _kernel_copy(copy_fn, src_fd, dst_fd, size):
+                    return False # The bytes never came through here
+        if size >= PIPELINE_MIN_BYTES and hasattr(os, "pread"):
+            _pipelined_copy(source.fileno(), dst_fd, size, hasher)
+        else:
+            _write_buffer(source, dst_fd, hasher)
+        return hasher is not None
+    finally:
+        os.close(dst_fd)
+
+
+# Userspace copy buffer: syscall overhead per byte flattens out around 1 MiB (shutil uses 64 KiB)
+COPY_BUFSIZE = 1024 * 1024
+# Userspace copies of big files overlap the card read of one chunk with the write of the previous
+PIPELINE_CHUNK = COPY_BUFSIZE
+PIPELINE_MIN_BYTES = 2 * PIPELINE_CHUNK # Below this there's nothing to overlap
+# Each copy thread keeps its pipeline buffers (2 queued + 1 reading + 1 writing) across files
+_copy_local = threading.local()
+
+
+def _pipelined_copy(src_fd, dst_fd, size, hasher=None):
+    """Copy src_fd to dst_fd with a reader thread feeding this (writer) thread through a
+       2-slot queue, so reading chunk N+1 overlaps writing chunk N and memory stays bounded.
+       pread keeps the shared source descriptor's position untouched; the chunk buffers are
+       this thread's own and reused, so steady-state copying allocates nothing."""
+    buffers = getattr(_copy_local, 'buffers', None)
+    if buffers is None:
+        buffers = _copy_local.buffers = [bytearray(PIPELINE_CHUNK) for _ in range(4)]
+    free = queue.Queue()
+    for buf in buffers:
+        free.put(buf)
+    chunks = queue.Queue(maxsize=2)
+    stop = threading.Event() # Writer failed: tell the reader to quit instead of blocking on put
+
+    def reader():
+        offset = 0
+        try:
+            while offset < size and not stop.is_set():
+                buf = free.get()
+                want = min(PIPELINE_CHUNK, size - offset)
+                if hasattr(os, "preadv"):
+                    n = os.preadv(src_fd, [memoryview(buf)[:want]], offset) # Straight into the buffer
+                else:
+                    data = os.pread(src_fd, want, offset)
+                    n = len(data)
+                    buf[:n] = data
+                if not n:
+                    break # Source got shorter under us; copy what there is
+                offset += n
+                chunks.put((buf, n))
+        except OSError as e:
+            chunks.put(e)
+        finally:
+            chunks.put(None) # EOF sentinel
+
+    reader_thread = threading.Thread(target=reader, daemon=True)
+    reader_thread.start()
+    try:
+        with open(dst_fd, 'wb', buffering=0, closefd=False) as f:
+            while (chunk := chunks.get()) is not None:
+                if isinstance(chunk, OSError):
+                    raise chunk
+                buf, n = chunk
+                with memoryview(buf) as view:
+                    view = view[:n]
+                    if hasher is not None:
+                        hasher.update(view) # Tee: digest the copy without reading it back
+                    while view:
+                        view = view[f.write(view):]
+                free.put(buf)
+    finally:
+        stop.set()
+        while reader_thread.is_alive(): # Drain so a blocked put()/get() can finish
+            try:
+                item = chunks.get(timeout=0.1)
+                if isinstance(item, tuple):
+                    free.put(item[0])
+            except queue.Empty:
+                free.put(bytearray(0)) # Unblock a reader waiting for a free buffer
+        reader_thread.join()
+
+
+def _write_buffer(source, dst_fd, hasher=None):
+    """Write a SharedSource's buffer to dst_fd through a memoryview (no per-destination copy)."""
+    with memoryview(source.buffer()) as view, open(dst_fd, 'wb', closefd=False) as f:
+        if hasher is not None:
+            hasher.update(view)
+        f.write(view)
 
 
 # Main class for photo backup functionality
@@ -104,7 +651,7 @@ class PhotoBackup:
         self.append_location = True
         self.folder_suffix = ""
         self.cli_mode = cli_mode # <-- Store CLI mode
-        self.status = {
+        self.status = StatusDict({
             "total_files": 0,
             "processed_files": 0,
             "current_file": "",
@@ -112,23 +659,69 @@ class PhotoBackup:
             "start_time": 0,
             "bytes_total": 0,
             "bytes_processed": 0,
+            "skipped_copies": 0, # Destination copies already up to date (same size and mtime)
             "complete": False,
             "error": None
-        }
-        # Cache for location data to avoid redundant lookups
+        })
+        # Online location names keyed by rounded coordinates, persisted across runs
         self.location_cache = {}
+        # Offline (reverse_geocoder) names keyed by rounded coordinates, filled in one batch per run
+        self.offline_location_cache = {}
         # Cache for file hashes to avoid recalculating
-        self.hash_cache = {}
+        self.hash_cache = LRUCache(HASH_CACHE_SIZE)
+        # Folder naming function for the current run (see _make_folder_name_fn)
+        self._folder_name_fn = None
+        # Hash/date/GPS remembered across runs (opened for the duration of backup_images)
+        self.file_cache = None
         # Cache for date information
-        self.date_cache = {}
-        # Status update queue
-        self.status_queue = queue.Queue()
-        # Number of worker threads
+        self.date_cache = LRUCache(DATE_CACHE_SIZE)
+        # Cache for parsed EXIF tags so date and location share one parse per file
+        self.exif_cache = LRUCache(EXIF_CACHE_SIZE)
+        # (date_str, coords) per file read ahead of the copy stage (location prefetch)
+        self.meta_cache = LRUCache(DATE_CACHE_SIZE)
+        # EXIF worker processes, only used while backup_images runs (see _get_meta_pool)
+        self._meta_pool = None
+        self._meta_pool_lock = threading.Lock()
+        self._meta_pool_enabled = False
+        self._meta_pool_failed = False
+        # Per-destination copy threads for process_image (backup_images uses its own per-drive pools)
+        self._dest_pool = None
+        self._dest_pool_size = 0
+        self._dest_pool_lock = threading.Lock()
+        # Destination folders already created this run, keyed by (dest_dir, folder_name)
+        self._dir_cache = {}
+        self._dir_lock = threading.Lock()
+        # Progress: each worker thread bumps its own [files, bytes] tally without locking;
+        # the status thread sums all tallies (registered once per thread under _status_lock)
+        self._status_lock = threading.Lock()
+        self._tally_local = threading.local()
+        self._tallies = []
+        self._current_file = ""
+        self._status_stop = threading.Event()
+        # Set once the source scan has finished (totals are final); sizes may still be arriving
+        # from the workers when the scan streams without stats (see backup_images)
+        self._scan_done = threading.Event()
+        self._sizes_deferred = False
+        # Recent per-file errors (bounded so a failing card can't grow it without limit)
+        self.errors = deque(maxlen=100)
+        # Fallback folder date, formatted once (refreshed at the start of each backup)
+        self._today_str = datetime.datetime.now().strftime('%Y-%m-%d')
+        # Number of worker threads for CPU-bound work (EXIF parsing, hashing)
         self.num_workers = max(4, os.cpu_count() or 4)
+        # CPU pool used for EXIF parsing and to hash an existing target while the
+        # copy worker hashes the source (set during backup_images)
+        self._cpu_pool = None
         # Flag to control geocoding (set based on user choice)
         self._should_geocode = True # Default, will be updated based on config/choice
         self._internet_checked = False
         self._has_internet = False
+        # Online geocoding: one worker, requests spaced NOMINATIM_MIN_INTERVAL apart (in _geocode_online),
+        # in-flight requests shared per coordinate
+        self._geocode_pool = ThreadPoolExecutor(max_workers=1)
+        self._last_geocode = None # time.monotonic() when the previous request finished
+        self._geocode_futures = {}
+        self._geocode_lock = threading.Lock()
+        self._geolocator = None
 
 
     def _check_internet(self):
@@ -142,29 +735,86 @@ class PhotoBackup:
 
     def get_exif_data(self, image_path):
         """Extract EXIF data from an image using exifread."""
-        # Check cache first (though less likely for raw EXIF)
-        # if image_path in self.exif_cache: return self.exif_cache[image_path]
+        # Check cache first so date and location lookups don't reparse the header
+        exif_data = self.exif_cache.get(image_path)
+        if exif_data is not None:
+            return exif_data
         exif_data = {}
+        ext = os.path.splitext(image_path)[1].lower()
+        if ext not in EXIF_EXTS:
+            return exif_data # Format never holds EXIF, don't scan it
         try:
             with open(image_path, 'rb') as img_file:
-                # Stop processing certain tags for speed if not needed (e.g., MakerNote)
-                tags = exifread.process_file(img_file, stop_tag='MakerNote', details=False)
-                # Alternative: process_file(img_file, details=False) is faster
-                for tag, value in tags.items():
-                    # Handle potential encoding issues gracefully
-                    try:
-                       exif_data[tag] = value
-                    except Exception:
-                        pass # Ignore tags that cause issues during processing
+                # JPEG/PNG: jump straight to the EXIF block by walking segment/chunk headers
+                if ext in ('.jpg', '.jpeg', '.png'):
+                    block = self._exif_tiff_block(img_file, ext)
+                    if block is not None:
+                        try:
+                            # The block is a self-contained TIFF structure exifread parses directly
+                            exif_data = exifread.process_file(io.BytesIO(block), stop_tag=EXIF_STOP_TAG, details=False, strict=False)
+                            self.exif_cache[image_path] = exif_data
+                            return exif_data
+                        except Exception:
+                            exif_data = {} # Malformed block, let the generic path try
+                    img_file.seek(0) # Unusual layout: fall back to exifread's own search
+
+                # Parse only the file head first instead of letting exifread pull in the whole image
+                head = img_file.read(EXIF_HEAD_BYTES)
+                try:
+                    # Stop as soon as the capture date is read; nothing after it is used
+                    tags = exifread.process_file(io.BytesIO(head), stop_tag=EXIF_STOP_TAG, details=False, strict=False)
+                except Exception:
+                    tags = {} # Truncated IFD offsets, retry below with the full file
+                if len(head) == EXIF_HEAD_BYTES and 'EXIF DateTimeOriginal' not in tags:
+                    # EXIF block ran past the head (or sits deeper in a RAW container): parse the full file once
+                    img_file.seek(0)
+                    tags = exifread.process_file(img_file, stop_tag=EXIF_STOP_TAG, details=False, strict=False)
+                # exifread already returns a plain dict of tag name -> IfdTag; use it as is
+                exif_data = tags
         except FileNotFoundError:
              print(f"Error: File not found during EXIF read: {image_path}") # More specific error
         except Exception as e:
             # Log less critical errors without stopping, maybe just for verbose mode
             # print(f"Warning: Could not read EXIF for {os.path.basename(image_path)}: {e}")
             pass
-        # self.exif_cache[image_path] = exif_data # Cache if needed
+        self.exif_cache[image_path] = exif_data
         return exif_data
 
+    @staticmethod
+    def _exif_tiff_block(f, ext):
+        """Return the raw TIFF-structured EXIF payload of a JPEG (APP1) or PNG (eXIf chunk),
+           reading only segment headers on the way. None if absent or the layout is unexpected."""
+        if ext == '.png':
+            if f.read(8) != b'\x89PNG\r\n\x1a\n':
+                return None
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    return None
+                length, chunk_type = struct.unpack('>I4s', header)
+                if chunk_type == b'eXIf':
+                    return f.read(length)
+                if chunk_type in (b'IDAT', b'IEND'):
+                    return None # eXIf must come before the image data to be cheap to find
+                f.seek(length + 4, 1) # Skip chunk data and CRC
+
+        if f.read(2) != b'\xff\xd8':
+            return None
+        while True:
+            header = f.read(4)
+            if len(header) < 4 or header[0] != 0xFF:
+                return None
+            marker = header[1]
+            length = struct.unpack('>H', header[2:])[0]
+            if marker in (0xDA, 0xD9): # Start of scan / end of image: no EXIF ahead
+                return None
+            if marker == 0xE1:
+                data = f.read(length - 2)
+                if data.startswith(b'Exif\x00\x00'):
+                    return data[6:]
+                continue # An XMP APP1; EXIF may still follow
+            f.seek(length - 2, 1)
+
     def get_gps_data(self, exif_data):
         """Extract GPS data from EXIF."""
         gps_info = {}
@@ -232,62 +882,49 @@ class PhotoBackup:
         # Only proceed if geocoding is enabled for this run
         if not self._should_geocode:
             return "Unknown"
+        return self._get_location_from_tags(self.get_exif_data(image_path), image_path)
 
-        # Check cache first
-        if image_path in self.location_cache:
-            return self.location_cache[image_path]
+
+    def _get_location_from_tags(self, exif_data, image_path):
+        """Resolve the location name for an image from its already-parsed EXIF tags."""
+        # Only proceed if geocoding is enabled for this run
+        if not self._should_geocode:
+            return "Unknown"
+        return self._get_location_from_coords(self.get_coordinates(self.get_gps_data(exif_data)), image_path)
+
+
+    def _get_location_from_coords(self, coords, image_path):
+        """Resolve the location name for decimal (lat, lon) coordinates (None -> "Unknown")."""
+        # Only proceed if geocoding is enabled for this run
+        if not self._should_geocode:
+            return "Unknown"
 
         location_result = "Unknown" # Default
         try:
-            exif_data = self.get_exif_data(image_path)
-            gps_info = self.get_gps_data(exif_data)
-            coords = self.get_coordinates(gps_info)
-
             if not coords:
-                self.location_cache[image_path] = location_result
                 return location_result
 
+            # Photos within ~110 m share one lookup, online and offline
+            coord_key = self._coord_key(coords)
+
             # Try online geocoding first if connected
             if self._check_internet():
-                try:
-                    from geopy.geocoders import Nominatim
-                    from geopy.exc import GeocoderTimedOut, GeocoderServiceError
-                except ImportError:
-                    if self.cli_mode: print("Geopy not installed, cannot use online geocoding. 'pip install geopy'")
-                    # Fall through to offline method
-                else:
-                    try:
-                        geolocator = Nominatim(user_agent="photo_backup_tool_cli_v1") # Unique agent
-                        # Increased timeout, language preference
-                        location = geolocator.reverse(f"{coords[0]}, {coords[1]}", language="en", timeout=10)
-                        if location and location.raw and "address" in location.raw:
-                            address = location.raw["address"]
-                            # Prioritize more specific fields if they exist
-                            fields = ["neighbourhood", "suburb", "village", "hamlet", "city_district", "town", "city", "county", "state", "country"]
-                            for field in fields:
-                                if field in address:
-                                    location_result = address[field]
-                                    break # Use the first specific field found
-                            self.location_cache[image_path] = location_result
-                            return location_result
-                        # If online lookup gave no useful result, fall through
-                    except (GeocoderTimedOut, GeocoderServiceError) as geo_err:
-                        if self.cli_mode: print(f"Warning: Online geocoding failed: {geo_err}. Falling back to offline.")
-                    except Exception as e:
-                        if self.cli_mode: print(f"Warning: Error during online geocoding: {e}. Falling back to offline.")
+                online_result = self._get_online_location(coord_key)
+                if online_result:
+                    return online_result
+                # If online lookup gave no useful result, fall through
 
 
             # Fallback to reverse_geocoder (offline)
             try:
-                # Use mode 2 for faster performance with slightly less accuracy if needed
-                # results = rg.search(coords, mode=2)
-                results = rg.search(coords) # Default mode 1
-                if results:
-                    result = results[0]
-                    # Prioritize name, admin2, admin1, cc
-                    location_result = result.get('name') or result.get('admin2') or result.get('admin1') or result.get('cc', 'Unknown')
+                if coord_key in self.offline_location_cache:
+                    # Already resolved by the batched lookup in backup_images
+                    location_result = self.offline_location_cache[coord_key]
                 else:
-                    location_result = "Unknown" # Offline lookup returned nothing
+                    # Use mode 2 for faster performance with slightly less accuracy if needed
+                    # results = rg.search(coords, mode=2)
+                    results = rg.search(coords) # Default mode 1
+                    location_result = self._offline_location_name(results[0]) if results else "Unknown"
             except Exception as rg_err:
                  if self.cli_mode: print(f"Warning: Offline reverse geocoding failed: {rg_err}")
                  location_result = "Unknown" # Error during offline lookup
@@ -301,32 +938,295 @@ class PhotoBackup:
             if self.cli_mode: print(f"Warning: Unexpected error getting location for {os.path.basename(image_path)}: {e}")
             location_result = "Unknown"
 
-        self.location_cache[image_path] = location_result
         return location_result
 
 
+    def _get_online_location(self, coord_key):
+        """Online location name for a rounded coordinate, or None if the lookup failed.
+           Concurrent workers asking for the same coordinate share one in-flight request."""
+        if coord_key in self.location_cache:
+            return self.location_cache[coord_key]
+
+        location_result = self._queue_online_lookup(coord_key).result()
+        if location_result:
+            self.location_cache[coord_key] = location_result # Persisted at the end of the run
+        return location_result
+
+
+    def _queue_online_lookup(self, coord_key):
+        """Future for the online name of coord_key; each rounded coordinate is requested once,
+           and it is the rounded coordinate that is looked up (the name is shared by the whole cell)."""
+        with self._geocode_lock:
+            future = self._geocode_futures.get(coord_key)
+            if future is None:
+                if coord_key in self.location_cache: # Known from an earlier run
+                    future = Future()
+                    future.set_result(self.location_cache[coord_key])
+                else:
+                    # Single worker: requests go out one at a time, spaced by _geocode_online
+                    future = self._geocode_pool.submit(self._geocode_online, coord_key)
+                self._geocode_futures[coord_key] = future
+        return future
+
+
+    def _geocode_online(self, coords):
+        """Reverse-geocode coordinates with Nominatim. Returns the name, or None on failure."""
+        try:
+            from geopy.geocoders import Nominatim
+            from geopy.exc import GeocoderTimedOut, GeocoderServiceError
+        except ImportError:
+            if self.cli_mode: print("Geopy not installed, cannot use online geocoding. 'pip install geopy'")
+            return None # Fall through to offline method
+
+        try:
+            if self._geolocator is None:
+                self._geolocator = Nominatim(user_agent="photo_backup_tool_cli_v1") # Unique agent
+            # One worker runs these, so the gap since the previous request needs no lock
+            if self._last_geocode is not None:
+                wait = self._last_geocode + NOMINATIM_MIN_INTERVAL - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+            try:
+                # Increased timeout, language preference
+                location = self._geolocator.reverse(f"{coords[0]}, {coords[1]}", language="en", timeout=10)
+            finally:
+                self._last_geocode = time.monotonic()
+            if location and location.raw and "address" in location.raw:
+                address = location.raw["address"]
+                # Prioritize more specific fields if they exist
+                fields = ["neighbourhood", "suburb", "village", "hamlet", "city_district", "town", "city", "county", "state", "country"]
+                for field in fields:
+                    if field in address:
+                        return address[field] # Use the first specific field found
+        except (GeocoderTimedOut, GeocoderServiceError) as geo_err:
+            if self.cli_mode: print(f"Warning: Online geocoding failed: {geo_err}. Falling back to offline.")
+        except Exception as e:
+            if self.cli_mode: print(f"Warning: Error during online geocoding: {e}. Falling back to offline.")
+        return None
+
+
+    @staticmethod
+    def _coord_key(coords):
+        """Round (lat, lon) so photos taken a few metres apart share a lookup."""
+        return (round(coords[0], COORD_PRECISION), round(coords[1], COORD_PRECISION))
+
+    @staticmethod
+    def _offline_location_name(result):
+        """Pick the most specific name from a reverse_geocoder result."""
+        # Prioritize name, admin2, admin1, cc
+        return result.get('name') or result.get('admin2') or result.get('admin1') or result.get('cc', 'Unknown')
+
+    def _gps_rationals_from_tags(self, exif_data):
+        """Raw GPS rationals from parsed tags as ([6 numerators], [6 denominators], south, west), or None.
+           Plain ints/bools so they cross process boundaries; _rationals_to_coords converts them."""
+        gps_info = self.get_gps_data(exif_data)
+        if not gps_info:
+            return None
+        try:
+            triplets = list(gps_info['GPSLatitude']) + list(gps_info['GPSLongitude'])
+            if len(triplets) != 6:
+                return None
+            return ([v.num for v in triplets], [v.den for v in triplets],
+                    gps_info.get('GPSLatitudeRef') == 'S', gps_info.get('GPSLongitudeRef') == 'W')
+        except (AttributeError, TypeError):
+            return None # Malformed GPS data
+
+    @staticmethod
+    def _rationals_to_coords(rationals):
+        """Convert many GPS rational sets to decimal (lat, lon) in one NumPy pass, None where invalid.
+           Same arithmetic as get_coordinates, so keys match the per-image path exactly."""
+        num = np.array([r[0] for r in rationals], dtype=np.float64).reshape(-1, 2, 3)
+        den = np.array([r[1] for r in rationals], dtype=np.float64).reshape(-1, 2, 3)
+        sign = np.where(np.array([[r[2], r[3]] for r in rationals], dtype=bool), -1.0, 1.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            parts = num / den
+            deg = (parts[..., 0] + parts[..., 1] / 60.0 + parts[..., 2] / 3600.0) * sign
+        # Drop zero denominators and out-of-range values, like get_coordinates does
+        valid = np.isfinite(deg).all(axis=1) & (np.abs(deg[:, 0]) <= 90) & (np.abs(deg[:, 1]) <= 180)
+        return [tuple(c) if ok else None for c, ok in zip(deg.tolist(), valid.tolist())]
+
+    def _cached_meta(self, image_path, source_stat):
+        """(date_str, coords) from the file cache, or None if the file has to be parsed."""
+        row = self.file_cache.get(image_path, source_stat) if self.file_cache is not None else None
+        if row and row["date"]:
+            return row["date"], ((row["lat"], row["lon"]) if row["lat"] is not None else None)
+        return None
+
+    def _batch_extract_meta(self, paths):
+        """(date_str, GPS rationals or None) for each path, in order. The worker processes get
+           them in chunks, so IPC is paid per batch rather than per image."""
+        pool = self._get_meta_pool()
+        if pool is not None and paths:
+            try:
+                chunksize = max(1, min(64, len(paths) // (META_PROCESSES * 4)))
+                return list(pool.map(_extract_meta_worker, paths, chunksize=chunksize))
+            except Exception as e: # BrokenProcessPool, pickling trouble...: parse here instead
+                if self.cli_mode: print(f"Warning: EXIF worker processes failed ({e}). Parsing in-process.")
+                self._meta_pool_failed = True
+        with ThreadPoolExecutor(max_workers=self.num_workers) as executor:
+            return list(executor.map(self._meta_from_exif, paths))
+
+    def prefetch_offline_locations(self, image_files):
+        """Read date/GPS for every (path, stat) file and reverse-geocode them all with a single
+           batched rg.search call, so the KD-tree query runs once per run instead of once per image.
+           The metadata is kept so the copy stage doesn't parse those files again."""
+        all_coords = []
+        miss_items = []
+        for image_path, source_stat in image_files:
+            cached = self._cached_meta(image_path, source_stat)
+            if cached:
+                self.meta_cache[image_path] = cached
+                if cached[1]: all_coords.append(cached[1])
+            else:
+                miss_items.append((image_path, source_stat))
+        # Everything not cached is parsed in one batched pass over the worker processes
+        misses = list(zip(miss_items, self._batch_extract_meta([path for path, _ in miss_items])))
+        # Convert all freshly parsed GPS rationals in one vectorized pass
+        with_gps = [(item, date_str, rational) for item, (date_str, rational) in misses if rational]
+        converted = dict(zip((item[0] for item, _, _ in with_gps),
+                             self._rationals_to_coords([r for _, _, r in with_gps]) if with_gps else []))
+        for (image_path, source_stat), (date_str, _) in misses:
+            coords = converted.get(image_path)
+            self._store_meta(image_path, source_stat, date_str, coords)
+            if coords: all_coords.append(coords)
+        coord_keys = list({self._coord_key(c) for c in all_coords})
+        if not coord_keys:
+            return
+        # Start the (rate-limited) online lookups now, one per distinct ~110 m cell, so they run
+        # while files are copying instead of when each cell's first photo reaches a worker
+        if self._check_internet():
+            for coord_key in coord_keys:
+                self._queue_online_lookup(coord_key)
+        try:
+            results = rg.search(coord_keys)
+        except Exception as rg_err:
+            # Per-image lookups in get_location_name will retry and report
+            if self.cli_mode: print(f"Warning: Batched offline reverse geocoding failed: {rg_err}")
+            return
+        for coord_key, result in zip(coord_keys, results):
+            self.offline_location_cache[coord_key] = self._offline_location_name(result)
+
+
+    def precreate_folders(self, image_files):
+        """Create every destination folder the prefetched files need up front, once each,
+           so an unwritable destination shows up before copying starts. Names that would
+           still wait on an online lookup are left to _get_target_dir during the copy."""
+        online = self._should_geocode and self._check_internet()
+        folder_name_fn = self._folder_name_fn or self._make_folder_name_fn()
+        folder_names = set()
+        for image_path, _ in image_files:
+            meta = self.meta_cache.get(image_path)
+            if meta is None:
+                continue # Evicted or unreadable: resolved during the copy
+            date_str, coords = meta
+            if online and coords and self._coord_key(coords) not in self.location_cache:
+                continue # Don't hold up the first copy behind the rate-limited geocoder
+            folder_names.add(folder_name_fn(date_str, coords, image_path))
+        for dest_dir in self.destination_dirs:
+            for folder_name in folder_names:
+                try:
+                    self._get_target_dir(dest_dir, folder_name)
+                except OSError as e:
+                    self._record_error(f"Error creating folder {folder_name} in {dest_dir}: {e}")
+                    break # The rest of this destination would fail the same way
+
+
+    def get_file_meta(self, image_path, source_stat=None):
+        """Folder date and decimal GPS coordinates (or None) for an image.
+           Unchanged files are answered from the file cache without opening them."""
+        meta = self.meta_cache.get(image_path)
+        if meta is not None:
+            return meta # Already read by the location prefetch
+        cached = self._cached_meta(image_path, source_stat) if source_stat is not None else None
+        if cached:
+            return cached
+
+        date_str, rational = self._extract_meta(image_path)
+        coords = self._rationals_to_coords([rational])[0] if rational else None
+        return self._store_meta(image_path, source_stat, date_str, coords)
+
+
+    def _store_meta(self, image_path, source_stat, date_str, coords):
+        """Remember freshly parsed metadata for this run and, if the file was stat'ed, across runs."""
+        meta = (date_str, coords)
+        self.meta_cache[image_path] = meta
+        if self.file_cache is not None and source_stat is not None:
+            self.file_cache.put(image_path, source_stat, date=date_str,
+                                lat=coords[0] if coords else None, lon=coords[1] if coords else None)
+        return meta
+
+
+    def _meta_from_exif(self, image_path):
+        """(date_str, GPS rationals or None) for an image, parsed in this process."""
+        exif_data = self.get_exif_data(image_path)
+        return self._get_date_from_tags(exif_data, image_path), self._gps_rationals_from_tags(exif_data)
+
+
+    def _extract_meta(self, image_path):
+        """(date_str, GPS rationals or None), parsed in the worker process pool when it's available."""
+        pool = self._get_meta_pool()
+        if pool is not None:
+            try:
+                return pool.submit(_extract_meta_worker, image_path).result()
+            except Exception as e: # BrokenProcessPool, pickling trouble...: parse here instead
+                if self.cli_mode: print(f"Warning: EXIF worker process failed ({e}). Parsing in-process.")
+                self._meta_pool_failed = True
+        return self._meta_from_exif(image_path)
+
+
+    def _get_dest_pool(self):
+        """Thread pool for process_image's per-destination copies, grown to the destination count."""
+        with self._dest_pool_lock:
+            wanted = max(2, len(self.destination_dirs))
+            if self._dest_pool is None or self._dest_pool_size < wanted:
+                if self._dest_pool is not None:
+                    self._dest_pool.shutdown(wait=False) # Queued work still finishes
+                self._dest_pool = ThreadPoolExecutor(max_workers=wanted)
+                self._dest_pool_size = wanted
+            return self._dest_pool
+
+
+    def _get_meta_pool(self):
+        """The EXIF process pool for the current backup, started on first use (None outside a backup)."""
+        if not self._meta_pool_enabled or self._meta_pool_failed:
+            return None
+        if self._meta_pool is None:
+            with self._meta_pool_lock:
+                if self._meta_pool is None:
+                    try:
+                        self._meta_pool = ProcessPoolExecutor(max_workers=META_PROCESSES)
+                    except (OSError, NotImplementedError, ImportError) as e:
+                        # e.g. no working multiprocessing semaphores on this platform
+                        if self.cli_mode: print(f"Warning: Cannot start EXIF worker processes ({e}).")
+                        self._meta_pool_failed = True
+                        return None
+        return self._meta_pool
+
+
     def get_date_from_image(self, image_path):
         """Extract date from image metadata (EXIF preferred) or file modification time."""
-        if image_path in self.date_cache:
-            return self.date_cache[image_path]
+        date_str = self.date_cache.get(image_path)
+        if date_str is not None:
+            return date_str
+        return self._get_date_from_tags(self.get_exif_data(image_path), image_path)
+
+
+    def _get_date_from_tags(self, exif_data, image_path):
+        """Resolve the folder date for an image from its already-parsed EXIF tags."""
+        date_str = self.date_cache.get(image_path)
+        if date_str is not None:
+            return date_str
 
         date_str_result = None
         try:
-            # Try EXIF first
-            exif_data = self.get_exif_data(image_path)
-            date_tags = ['EXIF DateTimeOriginal', 'Image DateTime', 'EXIF DateTimeDigitized']
-            for tag in date_tags:
-                if tag in exif_data:
-                    date_str = str(exif_data[tag])
-                    # Handle various potential date formats (add more if needed)
-                    for fmt in ('%Y:%m:%d %H:%M:%S', '%Y-%m-%d %H:%M:%S'):
-                        try:
-                            date_obj = datetime.datetime.strptime(date_str.split('.')[0], fmt) # Ignore fractional seconds
-                            date_str_result = date_obj.strftime('%Y-%m-%d')
-                            break # Found a valid date
-                        except ValueError:
-                            continue # Try next format
-                if date_str_result: break # Found date in EXIF
+            # Try EXIF first; a regex on the date prefix avoids building datetime objects per file
+            for tag in _DATE_TAGS:
+                value = exif_data.get(tag)
+                if value and (m := _DATE_RE.match(str(value))):
+                    # Skip blank camera dates like "0000:00:00 00:00:00"
+                    if m[1] != '0000' and '01' <= m[2] <= '12' and '01' <= m[3] <= '31':
+                        date_str_result = f"{m[1]}-{m[2]}-{m[3]}"
+                        break # Found date in EXIF
 
             # If no valid EXIF date, use file modification time
             if not date_str_result:
@@ -337,41 +1237,84 @@ class PhotoBackup:
                         date_obj = datetime.datetime.fromtimestamp(mod_time)
                         date_str_result = date_obj.strftime('%Y-%m-%d')
                     else: # Fallback to current date if mod time seems invalid
-                        date_str_result = datetime.datetime.now().strftime('%Y-%m-%d')
+                        date_str_result = self._today_str
 
                 except OSError: # Handle file system errors getting mod time
-                     date_str_result = datetime.datetime.now().strftime('%Y-%m-%d')
+                     date_str_result = self._today_str
 
 
         except FileNotFoundError:
-             date_str_result = datetime.datetime.now().strftime('%Y-%m-%d')
+             date_str_result = self._today_str
              if self.cli_mode: print(f"Warning: File not found while getting date: {image_path}")
         except Exception as e:
             # Fallback for any other error
-            date_str_result = datetime.datetime.now().strftime('%Y-%m-%d')
+            date_str_result = self._today_str
             if self.cli_mode: print(f"Warning: Could not determine date for {os.path.basename(image_path)}, using current date. Error: {e}")
 
         # Ensure we always return *some* date string
         if date_str_result is None:
-            date_str_result = datetime.datetime.now().strftime('%Y-%m-%d')
+            date_str_result = self._today_str
 
         self.date_cache[image_path] = date_str_result
         return date_str_result
 
 
-    def calculate_file_hash(self, file_path):
-        """Calculate SHA-256 hash of a file"""
-        if file_path in self.hash_cache:
-            return self.hash_cache[file_path]
+    def files_sample_match(self, source_path, target_path):
+        """Cheap prefilter for same-size files: compare the first and last SAMPLE_BYTES.
+           Returns False as soon as the samples differ, so most mismatches never get hashed."""
+        with open(source_path, 'rb') as src, open(target_path, 'rb') as dst:
+            if src.read(SAMPLE_BYTES) != dst.read(SAMPLE_BYTES):
+                return False
+            size = os.fstat(src.fileno()).st_size
+            if size > SAMPLE_BYTES:
+                tail = min(SAMPLE_BYTES, size - SAMPLE_BYTES)
+                src.seek(-tail, os.SEEK_END)
+                dst.seek(-tail, os.SEEK_END)
+                return src.read(tail) == dst.read(tail)
+            return True
+
+
+    def calculate_file_hash(self, file_path, file_stat=None):
+        """Calculate a content hash of a file (BLAKE3 when installed, SHA-256 otherwise).
+           Digests are remembered in the file cache while the file's mtime and size are unchanged."""
+        result = self.hash_cache.get(file_path)
+        if result is not None:
+            return result
 
         try:
-            hash_sha256 = hashlib.sha256()
+            if self.file_cache is not None:
+                if file_stat is None:
+                    file_stat = os.stat(file_path)
+                row = self.file_cache.get(file_path, file_stat)
+                if row and row["hash"] and row["hash"].startswith(HASH_NAME + ":"):
+                    result = row["hash"][len(HASH_NAME) + 1:]
+                    self.hash_cache[file_path] = result
+                    return result
+
             with open(file_path, 'rb') as f:
-                # Read in larger chunks for potentially faster I/O
-                for chunk in iter(lambda: f.read(65536), b''):
-                    hash_sha256.update(chunk)
-            result = hash_sha256.hexdigest()
+                hasher = new_hasher()
+                mapped = False
+                large = os.fstat(f.fileno()).st_size >= MMAP_MIN_BYTES
+                if large:
+                    # Hand the whole mapped file to the hasher in one C call (no per-chunk Python loop)
+                    try:
+                        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                            if hasattr(mmap, 'MADV_SEQUENTIAL'): # Not available on Windows
+                                mm.madvise(mmap.MADV_SEQUENTIAL) # Ask the OS for aggressive readahead
+                            hasher.update(mm)
+                        mapped = True
+                    except (OSError, ValueError):
+                        pass # Some network/FUSE mounts can't be mapped: stream it below instead
+                if large and not mapped:
+                    # Streamed in chunks (read loop in C, GIL released), never read whole into memory;
+                    # file_digest takes any hasher constructor, BLAKE3 included
+                    hasher = hashlib.file_digest(f, new_hasher)
+                elif not mapped:
+                    hasher.update(f.read()) # Small file: a single read beats mmap setup
+                result = hasher.hexdigest()
             self.hash_cache[file_path] = result
+            if self.file_cache is not None:
+                self.file_cache.put(file_path, file_stat, hash=f"{HASH_NAME}:{result}")
             return result
         except FileNotFoundError:
             if self.cli_mode: print(f"Error: File not found during hash calculation: {file_path}")
@@ -384,203 +1327,337 @@ class PhotoBackup:
             return None
 
 
-    def process_image(self, image_path):
-        """Process a single image file"""
-        try:
-            base_name = os.path.basename(image_path)
-            # Get date and location/suffix for folder name
-            date_str = self.get_date_from_image(image_path)
-
-            # Determine folder name based on settings
-            if self.append_location:
-                location = self.get_location_name(image_path)
+    def _get_target_dir(self, dest_dir, folder_name):
+        """Return dest_dir/folder_name, creating it only the first time it's seen this run."""
+        key = (dest_dir, folder_name)
+        dir_path = self._dir_cache.get(key)
+        if dir_path is None:
+            with self._dir_lock:
+                dir_path = self._dir_cache.get(key)
+                if dir_path is None:
+                    dir_path = Path(dest_dir) / folder_name
+                    dir_path.mkdir(parents=True, exist_ok=True)
+                    self._dir_cache[key] = dir_path
+        return dir_path
+
+
+    def _make_folder_name_fn(self):
+        """Build the (date_str, coords, image_path) -> folder name function for the current settings."""
+        if self.append_location:
+            def folder_name_fn(date_str, coords, image_path):
                 # Sanitize location name for file systems
-                safe_location = "".join(c for c in location if c.isalnum() or c in (' ', '-', '_')).strip()
-                folder_name = f"{date_str} - {safe_location}" if safe_location != "Unknown" else date_str
-            elif self.folder_suffix:
-                 # Sanitize suffix as well
-                safe_suffix = "".join(c for c in self.folder_suffix if c.isalnum() or c in (' ', '-', '_')).strip()
-                folder_name = f"{date_str} - {safe_suffix}" if safe_suffix else date_str
-            else: # Just the date
-                folder_name = date_str
-
-            # Get file size once
+                safe_location = _safe_folder_part(self._get_location_from_coords(coords, image_path))
+                return f"{date_str} - {safe_location}" if safe_location != "Unknown" else date_str
+            return folder_name_fn
+        # Sanitize suffix once for the whole run
+        safe_suffix = _safe_folder_part(self.folder_suffix) if self.folder_suffix else ""
+        if safe_suffix:
+            return lambda date_str, coords, image_path: f"{date_str} - {safe_suffix}"
+        return lambda date_str, coords, image_path: date_str # Just the date
+
+
+    def plan_image(self, image_path, source_stat=None):
+        """Work out where an image goes: returns (folder_name, source_stat), or None if it can't be processed."""
+        base_name = os.path.basename(image_path)
+        try:
+            # Stat once (or reuse the scan's stat), before the metadata lookup: the file cache
+            # needs it as the signature, the size drives comparisons/progress and the times
+            # are stamped onto copies
             try:
-                file_size = os.path.getsize(image_path)
+                if source_stat is None:
+                    source_stat = os.stat(image_path)
+                    if self._sizes_deferred:
+                        self._tally()[4] += source_stat.st_size # Published by the status thread
             except FileNotFoundError:
-                 self.status_queue.put({"error": f"Error: Source file disappeared: {base_name}", "size": 0})
-                 return False # File vanished
+                 self._record_error(f"Error: Source file disappeared: {base_name}")
+                 return None # File vanished
             except OSError as e:
-                 self.status_queue.put({"error": f"Error getting size of {base_name}: {e}", "size": 0})
-                 return False
-
-
-            source_hash = None # Calculate only if needed for comparison
-            copied_to_any = False
-
-            # Copy file to each destination
-            for dest_dir in self.destination_dirs:
-                try:
-                    target_dir_path = Path(dest_dir) / folder_name
-                    target_dir_path.mkdir(parents=True, exist_ok=True)
+                 self._record_error(f"Error getting size of {base_name}: {e}")
+                 return None
 
-                    target_path = target_dir_path / base_name
-                    target_path_str = str(target_path) # Keep str version for os.path/shutil
+            # Date and GPS come from one EXIF parse (or the file cache)
+            date_str, coords = self.get_file_meta(image_path, source_stat)
 
-                    # --- Comparison Logic ---
-                    should_copy = True
-                    if target_path.exists():
-                        try:
-                            target_size = target_path.stat().st_size
-                            if target_size == file_size:
-                                # Sizes match, compare hashes (calculate source hash only now if needed)
-                                if source_hash is None:
-                                    source_hash = self.calculate_file_hash(image_path)
-                                    if source_hash is None: # Hash calculation failed
-                                        raise Exception(f"Could not calculate source hash for {base_name}")
-
-                                target_hash = self.calculate_file_hash(target_path_str)
-                                if target_hash is None: # Hash calculation failed
-                                     raise Exception(f"Could not calculate target hash for {target_path_str}")
-
-
-                                if source_hash == target_hash:
-                                    should_copy = False # Identical file exists
-                            # else: files exist but sizes differ, so we should copy (overwrite)
-
-                        except OSError as e:
-                            # Error accessing target file, maybe log and try copying anyway
-                            self.status_queue.put({"error": f"Warning: Could not check existing target {target_path_str}: {e}. Will attempt copy.", "size": 0})
-                            should_copy = True
-                        except Exception as e: # Catch hash calculation errors here too
-                            self.status_queue.put({"error": f"Warning: Error comparing hashes for {base_name} in {dest_dir}: {e}. Will attempt copy.", "size": 0})
-                            should_copy = True
-
-                    # --- Copy File ---
-                    if should_copy:
-                        try:
-                             # Use copy2 to preserve metadata
-                            shutil.copy2(image_path, target_path_str)
-                            copied_to_any = True
-                        except Exception as copy_err:
-                             # Log error for this specific destination, but continue to others
-                             self.status_queue.put({"error": f"Error copying {base_name} to {target_path_str}: {copy_err}", "size": 0})
+            # Folder name builder is specialized once per run for the chosen naming mode
+            folder_name_fn = self._folder_name_fn or self._make_folder_name_fn()
+            folder_name = folder_name_fn(date_str, coords, image_path)
+            return folder_name, source_stat
 
+        except Exception as e:
+            # Broad exception catch for the whole planning step
+            self._record_error(f"Critical error processing {base_name}: {str(e)}")
+            return None
 
-                except OSError as e:
-                     # Error creating directory or other OS issue for this destination
-                     self.status_queue.put({"error": f"Error processing destination {dest_dir} for {base_name}: {e}", "size": 0})
-                except Exception as e:
-                     # General error for this destination
-                     self.status_queue.put({"error": f"Unexpected error for {base_name} in {dest_dir}: {e}", "size": 0})
 
+    def copy_to_destination(self, image_path, dest_dir, folder_name, source_stat, source=None):
+        """Copy one image into dest_dir/folder_name unless an identical file is already there.
+           `source` is a SharedSource so all destinations read the card through one descriptor.
+           Errors are recorded, not raised. Returns True if a copy was written."""
+        base_name = os.path.basename(image_path)
+        copied = False
+        try:
+            target_dir_path = self._get_target_dir(dest_dir, folder_name)
 
-            # Update progress only once per source file, regardless of how many dests it went to
-            self.status_queue.put({
-                "file": base_name,
-                "size": file_size
-                # "copied": copied_to_any # Could add flag if needed
-            })
+            target_path_str = str(target_dir_path / base_name) # str for os/shutil calls
 
-            return True # Indicate the file was processed (even if copy failed somewhere)
+            # --- Fast path: claim the name atomically ---
+            # For the common new-file case this one open() replaces the exists/stat checks;
+            # only an existing target drops into the compare logic below.
+            try:
+                os.close(os.open(target_path_str, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644))
+                target_exists = False
+            except FileExistsError:
+                target_exists = True
+
+            # --- Comparison Logic ---
+            should_copy = True
+            if target_exists:
+                try:
+                    target_stat = os.stat(target_path_str)
+                    target_size = target_stat.st_size
+                    file_size = source_stat.st_size
+                    if target_size == file_size and abs(target_stat.st_mtime_ns - source_stat.st_mtime_ns) <= MTIME_TOLERANCE_NS:
+                        # Same size and mtime (we copy mtimes over), rsync-style: an earlier run's
+                        # copy, so skip without reading either file
+                        should_copy = False
+                        self._tally()[2] += 1
+                    elif target_size == file_size and not self.files_sample_match(image_path, target_path_str):
+                        pass # Same size but head/tail differ: overwrite without hashing
+                    elif target_size == file_size:
+                        # Sizes match, compare hashes (the source hash is memoized across destinations)
+                        if self._cpu_pool is not None:
+                            # Hash the target on the CPU pool so both disks stream at once
+                            target_future = self._cpu_pool.submit(self.calculate_file_hash, target_path_str, target_stat)
+                            source_hash = self.calculate_file_hash(image_path, source_stat)
+                            target_hash = target_future.result()
+                        else:
+                            source_hash = self.calculate_file_hash(image_path, source_stat)
+                            target_hash = self.calculate_file_hash(target_path_str, target_stat)
 
-        except Exception as e:
-            # Broad exception catch for the whole process_image function
-            self.status_queue.put({
-                "error": f"Critical error processing {os.path.basename(image_path)}: {str(e)}",
-                "size": 0
-            })
-            return False
+                        if source_hash is None: # Hash calculation failed
+                            raise Exception(f"Could not calculate source hash for {base_name}")
+                        if target_hash is None: # Hash calculation failed
+                             raise Exception(f"Could not calculate target hash for {target_path_str}")
 
 
-    def status_updater(self):
-        """Thread to update status information and print CLI progress."""
-        files_processed_since_last_print = 0
-        last_print_time = time.time()
+                        if source_hash == target_hash:
+                            should_copy = False # Identical file exists
+                    # else: files exist but sizes differ, so we should copy (overwrite)
 
-        while not self.status.get("complete", False): # Use get for safety
-            try:
-                update = self.status_queue.get(timeout=0.2) # Shorter timeout for responsiveness
-
-                if "error" in update:
-                    if self.cli_mode:
-                        # Print error immediately in CLI mode, ensuring it's on a new line
-                        print(f"\nERROR: {update['error']}", file=sys.stderr)
-                    else:
-                        # In UI mode, let the status endpoint report the error
-                        if self.status["error"] is None: # Store only the first error for UI simplicity
-                           self.status["error"] = update["error"]
-                        else: # Log subsequent errors if needed
-                           print(f"Additional Error: {update['error']}", file=sys.stderr)
-
-                elif "file" in update: # Successful file processing update
-                    self.status["current_file"] = update["file"]
-                    self.status["processed_files"] += 1
-                    self.status["bytes_processed"] += update["size"]
-                    files_processed_since_last_print += 1
-
-                    # --- Calculate ETA ---
-                    elapsed = time.time() - self.status["start_time"]
-                    if self.status["processed_files"] > 0 and elapsed > 1: # Avoid division by zero/instability at start
-                        # Option 1: Files per second
-                        # files_per_sec = self.status["processed_files"] / elapsed
-                        # remaining_files = self.status["total_files"] - self.status["processed_files"]
-                        # if files_per_sec > 0:
-                        #     est_seconds = remaining_files / files_per_sec
-
-                        # Option 2: Bytes per second (often more stable for varying file sizes)
-                        bytes_per_sec = self.status["bytes_processed"] / elapsed
-                        remaining_bytes = self.status["bytes_total"] - self.status["bytes_processed"]
-                        if bytes_per_sec > 0:
-                             est_seconds = remaining_bytes / bytes_per_sec
-                        else:
-                            est_seconds = float('inf') # Avoid division by zero if no bytes yet
+                except OSError as e:
+                    # Error accessing target file, maybe log and try copying anyway
+                    self._record_error(f"Warning: Could not check existing target {target_path_str}: {e}. Will attempt copy.")
+                    should_copy = True
+                except Exception as e: # Catch hash calculation errors here too
+                    self._record_error(f"Warning: Error comparing hashes for {base_name} in {dest_dir}: {e}. Will attempt copy.")
+                    should_copy = True
 
-                        if est_seconds != float('inf'):
-                            m, s = divmod(int(est_seconds), 60)
-                            h, m = divmod(m, 60)
-                            self.status["est_time_remaining"] = f"{h:d}:{m:02d}:{s:02d}"
-                        else:
-                            self.status["est_time_remaining"] = "Calculating..."
-                    else:
-                        self.status["est_time_remaining"] = "Calculating..."
+            # --- Copy File ---
+            if should_copy:
+                try:
+                    # In-kernel copy (sendfile / copy_file_range) and, unlike copy2, no copystat;
+                    # only the timestamps matter and we already have them
+                    own_source = source is None
+                    if own_source:
+                        source = SharedSource(image_path, 1)
+                    # Userspace copies hash on the way through, for the file cache (see below)
+                    hasher = new_hasher() if self.file_cache is not None else None
+                    try:
+                        hashed = copy_from_source(source, target_path_str, source_stat.st_size, hasher)
+                    finally:
+                        if own_source:
+                            source.release()
+                    os.utime(target_path_str, ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns))
+                    copied = True
+                    if self.file_cache is not None:
+                        if target_exists:
+                            # Overwritten in place: its cached hash may share the new mtime/size
+                            self.file_cache.forget(target_path_str)
+                        # Source and copy share a digest: cache it for the copy so a later run
+                        # comparing them never has to read either back
+                        digest = hasher.hexdigest() if hashed else self.hash_cache.get(image_path)
+                        if digest is not None:
+                            self._remember_copy_hash(image_path, source_stat, target_path_str, digest)
+                except Exception as copy_err:
+                     # Log error for this specific destination; other destinations still go ahead
+                     self._record_error(f"Error copying {base_name} to {target_path_str}: {copy_err}")
+                     if not target_exists:
+                         # Don't leave our empty/partial placeholder behind
+                         try:
+                             os.remove(target_path_str)
+                         except OSError:
+                             pass
 
 
-                    # --- CLI Progress Output ---
-                    # Update CLI progress bar less frequently to reduce overhead/flicker
-                    now = time.time()
-                    if self.cli_mode and (files_processed_since_last_print >= 5 or now - last_print_time > 1.0 or self.status["processed_files"] == self.status["total_files"]):
-                        percent = (self.status["processed_files"] / self.status["total_files"] * 100) if self.status["total_files"] > 0 else 0
-                        bar_len = 30
-                        filled_len = int(bar_len * self.status["processed_files"] // self.status["total_files"]) if self.status["total_files"] > 0 else 0
-                        bar = '█' * filled_len + '-' * (bar_len - filled_len)
+        except OSError as e:
+             # Error creating directory or other OS issue for this destination
+             self._record_error(f"Error processing destination {dest_dir} for {base_name}: {e}")
+        except Exception as e:
+             # General error for this destination
+             self._record_error(f"Unexpected error for {base_name} in {dest_dir}: {e}")
+        return copied
 
-                        # Truncate long filenames
-                        display_file = (update["file"][:35] + '...') if len(update["file"]) > 38 else update["file"]
 
-                        # Format bytes
-                        processed_mb = self.status["bytes_processed"] / (1024 * 1024)
-                        total_mb = self.status["bytes_total"] / (1024 * 1024)
+    def _remember_copy_hash(self, image_path, source_stat, target_path, digest):
+        """Record a fresh copy's digest for both ends, if the copy really is the whole source.
+           Best effort: the copy itself already succeeded."""
+        try:
+            target_stat = os.stat(target_path)
+            if target_stat.st_size != source_stat.st_size:
+                return # Source changed mid-copy; let a later comparison hash it properly
+            self.hash_cache[image_path] = digest
+            self.hash_cache[target_path] = digest
+            self.file_cache.put(image_path, source_stat, hash=f"{HASH_NAME}:{digest}")
+            self.file_cache.put(target_path, target_stat, hash=f"{HASH_NAME}:{digest}")
+        except (OSError, sqlite3.Error) as e:
+            if self.cli_mode: print(f"Warning: Could not cache hash for {target_path}: {e}")
+
+
+    def process_image(self, image_path, source_stat=None):
+        """Process a single image file: plan it, then copy it to all destinations at once"""
+        plan = self.plan_image(image_path, source_stat)
+        if plan is None:
+            return False
+        folder_name, source_stat = plan
+        source = SharedSource(image_path, len(self.destination_dirs))
 
-                        # Use carriage return `\r` to overwrite the line. Add spaces at the end to clear previous longer lines.
-                        print(f'\rProgress: [{bar}] {percent:.1f}% ({self.status["processed_files"]}/{self.status["total_files"]}) | {processed_mb:.1f}/{total_mb:.1f} MB | ETA: {self.status["est_time_remaining"]} | File: {display_file:<40}', end='')
-                        sys.stdout.flush() # Ensure it prints immediately
+        def copy_task(dest_dir):
+            try:
+                return self.copy_to_destination(image_path, dest_dir, folder_name, source_stat, source)
+            finally:
+                source.release()
 
-                        files_processed_since_last_print = 0
-                        last_print_time = now
+        if len(self.destination_dirs) == 1:
+            copy_task(self.destination_dirs[0])
+        else:
+            # Destinations are usually separate drives: overlap their writes
+            futures = [self._get_dest_pool().submit(copy_task, dest_dir) for dest_dir in self.destination_dirs]
+            for future in as_completed(futures):
+                future.result() # copy_to_destination records its own errors; surface anything else
+        # Update progress only once per source file, regardless of how many dests it went to
+        self._record_progress(os.path.basename(image_path), source_stat.st_size)
+        return True # Indicate the file was processed (even if copy failed somewhere)
+
+
+    def _tally(self):
+        """The calling thread's own counters:
+           [files done, bytes done, skipped copies, files found, bytes found (streamed scans)]."""
+        tally = getattr(self._tally_local, 'tally', None)
+        if tally is None:
+            # First use on this thread: register its tally (the only locked step)
+            tally = self._tally_local.tally = [0, 0, 0, 0, 0]
+            with self._status_lock:
+                self._tallies.append(tally)
+        return tally
+
+
+    def _record_progress(self, file_name, size):
+        """Count one finished source file in the calling worker's own tally; the status thread publishes the totals."""
+        tally = self._tally()
+        # Bytes before files so a reader never sees a file counted without its size
+        tally[1] += size
+        tally[0] += 1
+        self._current_file = file_name
+
+
+    def _record_error(self, message):
+        """Report a per-file error without stopping the backup."""
+        self.errors.append(message)
+        if self.cli_mode:
+            # Print error immediately in CLI mode, ensuring it's on a new line
+            print(f"\nERROR: {message}", file=sys.stderr)
+        elif self.status["error"] is None: # Store only the first error for UI simplicity
+            self.status["error"] = message
+        else: # Log subsequent errors if needed
+            print(f"Additional Error: {message}", file=sys.stderr)
+
+
+    def _refresh_status(self):
+        """Publish the worker counters into self.status and recompute the ETA.
+           All fields land in one dict.update so a status request never sees a half-written snapshot."""
+        with self._status_lock:
+            tallies = list(self._tallies)
+        # Each tally is only written by its own thread; reading a slightly stale value is fine here
+        processed_files = sum(t[0] for t in tallies)
+        processed_bytes = sum(t[1] for t in tallies)
+        skipped = sum(t[2] for t in tallies)
+        current_file = self._current_file
+
+        snapshot = {"processed_files": processed_files, "bytes_processed": processed_bytes, "skipped_copies": skipped}
+        if self._sizes_deferred:
+            # Streamed scan: totals grow as the scanner and workers find files
+            snapshot["total_files"] = sum(t[3] for t in tallies)
+            snapshot["bytes_total"] = sum(t[4] for t in tallies)
+        if current_file:
+            snapshot["current_file"] = current_file
+
+        # --- Calculate ETA ---
+        elapsed = time.time() - self.status["start_time"]
+        total_files = snapshot.get("total_files", self.status["total_files"])
+        total_bytes = snapshot.get("bytes_total", self.status["bytes_total"])
+        eta = "Calculating..."
+        if not self._scan_done.is_set():
+            eta = "Scanning..." # Totals still growing
+        elif self._sizes_deferred and processed_files > 0 and elapsed > 1:
+            # Not every size is known yet, so estimate from the file rate instead
+            remaining_files = total_files - processed_files
+            m, s = divmod(int(remaining_files * elapsed / processed_files), 60)
+            h, m = divmod(m, 60)
+            eta = f"{h:d}:{m:02d}:{s:02d}"
+        elif processed_files > 0 and elapsed > 1: # Avoid division by zero/instability at start
+            # Bytes per second (often more stable for varying file sizes than files per second)
+            bytes_per_sec = processed_bytes / elapsed
+            if bytes_per_sec > 0: # Avoid division by zero if no bytes yet
+                remaining_bytes = total_bytes - processed_bytes
+                m, s = divmod(int(remaining_bytes / bytes_per_sec), 60)
+                h, m = divmod(m, 60)
+                eta = f"{h:d}:{m:02d}:{s:02d}"
+        snapshot["est_time_remaining"] = eta
+
+        self.status.update(snapshot)
+
+
+    def _print_progress(self):
+        """Print the CLI progress bar on a single, overwritten line."""
+        processed = self.status["processed_files"]
+        total = self.status["total_files"]
+        scanning = not self._scan_done.is_set()
+        percent = (processed / total * 100) if total > 0 else 0
+        bar_len = 30
+        filled_len = int(bar_len * processed // total) if total > 0 else 0
+        bar = '█' * filled_len + '-' * (bar_len - filled_len)
+
+        # Truncate long filenames
+        current_file = self.status["current_file"]
+        display_file = (current_file[:35] + '...') if len(current_file) > 38 else current_file
+
+        # Format bytes
+        processed_mb = self.status["bytes_processed"] / (1024 * 1024)
+        total_mb = self.status["bytes_total"] / (1024 * 1024)
+
+        # Use carriage return `\r` to overwrite the line. Add spaces at the end to clear previous longer lines.
+        total_label = f"{total}+" if scanning else f"{total}" # "+" while the scan is still finding files
+        print(f'\rProgress: [{bar}] {percent:.1f}% ({processed}/{total_label}) | {processed_mb:.1f}/{total_mb:.1f} MB | ETA: {self.status["est_time_remaining"]} | File: {display_file:<40}', end='')
+        sys.stdout.flush() # Ensure it prints immediately
 
 
-                self.status_queue.task_done()
-            except queue.Empty:
-                # Queue is empty, check if main process marked as complete
-                if self.status.get("complete", False):
-                     break # Exit loop if processing is done and queue is empty
-                # Otherwise, just loop again after timeout
-                pass
+    def status_updater(self):
+        """Thread that periodically publishes worker progress and prints CLI progress.
+           Workers only bump their own thread's counters; nothing is locked or queued per file."""
+        last_printed = -1
+        while True:
+            stopping = self._status_stop.wait(STATUS_INTERVAL)
+            try:
+                self._refresh_status()
+                # Update CLI progress bar only when something changed to reduce flicker
+                if self.cli_mode and self.status["processed_files"] != last_printed:
+                    self._print_progress()
+                    last_printed = self.status["processed_files"]
             except Exception as e:
                  # Unexpected error in status updater itself
                  print(f"\nError in status updater: {e}", file=sys.stderr)
-                 # Consider breaking or logging more details
+            if stopping:
+                break
 
         # --- Final CLI Output ---
         if self.cli_mode:
@@ -591,10 +1668,95 @@ class PhotoBackup:
                  print(f"Backup finished with errors. See messages above.", file=sys.stderr)
              elif self.status.get("complete"):
                  print(f"Backup complete! {self.status['processed_files']}/{self.status['total_files']} files processed.")
+                 if self.status["skipped_copies"]:
+                     print(f"{self.status['skipped_copies']} copies were already up to date and skipped.")
              else: # Should not happen if loop logic is correct
                  print("Backup process finished.")
 
 
+    def _iter_images(self, source_dir, need_size=True, on_found=None, on_done=None):
+        """Yield (path, stat) for every image under source_dir, scanning each directory once with scandir.
+           Directories are listed concurrently on a small pool so their readdir latency overlaps;
+           results arrive in no particular order. With need_size=False the stat is None.
+           on_found(count) / on_done() are called from the scan threads as soon as files are
+           found / the scan finishes, even while the consumer is still behind."""
+        results = queue.Queue() # Lists of (path, stat) per directory, then None once the scan is done
+        outstanding = [1] # Directories submitted but not finished (starts with source_dir)
+        lock = threading.Lock()
+
+        def classify(entries):
+            """Split directory entries into (images with stats, subdirectories)."""
+            found, subdirs = [], []
+            for entry in entries:
+                # Extension test first: it's a string op, and is_file/is_dir come from readdir's d_type
+                name = entry.name
+                dot = name.rfind('.')
+                if dot >= 0 and name[dot + 1:].lower() in IMAGE_EXTENSIONS and entry.is_file():
+                    # Size for totals/ETA (on Windows this comes free with the directory listing)
+                    found.append((entry.path, _scan_stat(entry) if need_size else None))
+                elif entry.is_dir(follow_symlinks=False): # like os.walk, don't descend into linked dirs
+                    subdirs.append(entry.path)
+            return found, subdirs
+
+        def classify_batch(entries):
+            # Errors are handled per batch, not per entry
+            try:
+                return classify(entries)
+            except OSError:
+                # Rare (a file vanished or is unreadable mid-scan): redo this batch one
+                # entry at a time so a single bad file doesn't hide the rest
+                found, subdirs = [], []
+                for entry in entries:
+                    try:
+                        entry_found, entry_subdirs = classify((entry,))
+                    except OSError as e:
+                        print(f"Warning: Cannot access file {entry.path}: {e.strerror}", file=sys.stderr)
+                        continue
+                    found += entry_found
+                    subdirs += entry_subdirs
+                return found, subdirs
+
+        def scan_dir(path):
+            try:
+                try:
+                    with os.scandir(path) as it:
+                        # Consume the listing in batches straight off the iterator: a camera folder
+                        # with thousands of files starts feeding the copy workers after the first
+                        # batch instead of after the whole readdir, and memory stays flat
+                        while entries := list(itertools.islice(it, SCAN_BATCH)):
+                            found, subdirs = classify_batch(entries)
+                            for subdir in subdirs:
+                                with lock:
+                                    outstanding[0] += 1
+                                try:
+                                    pool.submit(scan_dir, subdir)
+                                except RuntimeError: # Pool shut down: the consumer stopped early
+                                    with lock:
+                                        outstanding[0] -= 1
+                            if found:
+                                if on_found is not None:
+                                    on_found(len(found))
+                                results.put(found)
+                except OSError as e:
+                    print(f"Warning: Cannot access directory {e.filename or path}: {e.strerror}", file=sys.stderr)
+            finally:
+                with lock:
+                    outstanding[0] -= 1
+                    done = outstanding[0] == 0
+                if done:
+                    if on_done is not None:
+                        on_done()
+                    results.put(None)
+
+        with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as pool:
+            pool.submit(scan_dir, source_dir)
+            while True:
+                batch = results.get()
+                if batch is None:
+                    break
+                yield from batch
+
+
     def backup_images(self):
         """Perform the backup operation using multiple threads"""
         self.status["start_time"] = time.time()
@@ -606,15 +1768,34 @@ class PhotoBackup:
         self.status["bytes_total"] = 0
         self.status["current_file"] = "Initializing..."
         self.status["est_time_remaining"] = "Calculating..."
-
-        # Clear caches at the start of each backup run
-        self.location_cache = {}
-        self.hash_cache = {}
-        self.date_cache = {}
+        self._today_str = datetime.datetime.now().strftime('%Y-%m-%d')
+        with self._status_lock:
+            # Fresh thread-local so this run's worker threads register new tallies
+            self._tally_local = threading.local()
+            self._tallies = []
+        self._current_file = ""
+        self.errors.clear()
+        self._status_stop = threading.Event()
+        self._scan_done = threading.Event()
+        self._sizes_deferred = False
+
+        # Clear caches at the start of each backup run (online locations come from disk)
+        self.location_cache = load_location_cache() if self.append_location else {}
+        self.offline_location_cache = {}
+        self._geocode_futures = {}
+        self.hash_cache.clear()
+        self.date_cache.clear()
+        self.exif_cache.clear()
+        self.meta_cache.clear()
+        self._dir_cache = {}
+        self._meta_pool_enabled = True
+        self._meta_pool_failed = False
+        self.file_cache = open_file_cache()
         self._internet_checked = False # Reset internet check flag
 
         # Set geocoding flag based on settings
         self._should_geocode = self.append_location
+        self._folder_name_fn = self._make_folder_name_fn()
 
         try:
             if not self.source_dir or not os.path.isdir(self.source_dir):
@@ -633,38 +1814,47 @@ class PhotoBackup:
                 print(f"To destinations: {', '.join(self.destination_dirs)}")
                 folder_mode = "Date + Location" if self.append_location else (f"Date + Suffix '{self.folder_suffix}'" if self.folder_suffix else "Date Only")
                 print(f"Folder naming: {folder_mode}")
-                print(f"Using {self.num_workers} worker threads.")
+                print(f"Using {self.num_workers} worker threads (+{IO_WORKERS} copy threads per destination).")
                 print("Scanning source directory...")
 
 
-            # Get list of all image files and calculate total size
-            image_files = []
-            total_size = 0
-            valid_extensions = ('.jpg', '.jpeg', '.png', '.gif', '.tiff', '.tif', '.bmp', '.heic', '.heif', ".arw", ".cr2", ".nef", ".dng", ".orf", ".rw2", ".pef", ".srw") # Added more raw types
-            for root, _, files in os.walk(self.source_dir, onerror=lambda e: print(f"Warning: Cannot access directory {e.filename}: {e.strerror}", file=sys.stderr)):
-                for file in files:
-                    if file.lower().endswith(valid_extensions):
-                        file_path = os.path.join(root, file)
-                        try:
-                            # Basic check if file is readable and get size
-                            file_stat = os.stat(file_path)
-                            image_files.append(file_path)
-                            total_size += file_stat.st_size
-                        except OSError as e:
-                            print(f"Warning: Cannot access file {file_path}: {e.strerror}", file=sys.stderr)
-
-
-            self.status["total_files"] = len(image_files)
-            self.status["bytes_total"] = total_size
-
-            if self.status["total_files"] == 0:
-                print("No image files found in the source directory.")
-                self.status["complete"] = True
-                self.status["current_file"] = ""
-                return # Nothing to do
+            if self._should_geocode:
+                # Location naming resolves every file's offline place name in one batch up front,
+                # so this mode needs the full list (with stats) before processing starts
+                image_files = list(self._iter_images(self.source_dir))
+                total_size = sum(st.st_size for _, st in image_files)
+                # Largest files first: they dominate the run time and give the ETA real data early
+                image_files.sort(key=lambda item: item[1].st_size, reverse=True)
+
+                self.status["total_files"] = len(image_files)
+                self.status["bytes_total"] = total_size
+
+                if self.status["total_files"] == 0:
+                    print("No image files found in the source directory.")
+                    self.status["complete"] = True
+                    self.status["current_file"] = ""
+                    return # Nothing to do
+
+                if self.cli_mode:
+                    print(f"Found {self.status['total_files']} image files, total size {total_size / (1024*1024):.2f} MB.")
+
+                # Resolve all offline location names up front in one batch (EXIF parsed here is cached)
+                self.status["current_file"] = "Reading GPS data..."
+                if self.cli_mode: print("Reading GPS data...")
+                self.prefetch_offline_locations(image_files)
+                self.precreate_folders(image_files)
+                self._scan_done.set()
+            else:
+                # Stream straight from the scanner: copying starts with the first file found.
+                # The scanner only counts files; each size is added when its worker stats it,
+                # so no metadata pass over the card happens before the first copy.
+                def on_found(count):
+                    self._tally()[3] += count # Scan thread's own counter, published by the status thread
+                self._sizes_deferred = True
+                image_files = self._iter_images(self.source_dir, need_size=False,
+                                                on_found=on_found, on_done=self._scan_done.set)
 
             if self.cli_mode:
-                print(f"Found {self.status['total_files']} image files, total size {total_size / (1024*1024):.2f} MB.")
                 print("Starting processing...")
 
 
@@ -673,27 +1863,65 @@ class PhotoBackup:
             status_thread = threading.Thread(target=self.status_updater, daemon=not self.cli_mode)
             status_thread.start()
 
-            # Process files with thread pool
-            # Using 'with' ensures threads are joined before proceeding
-            with ThreadPoolExecutor(max_workers=self.num_workers) as executor:
-                # map will process items and collect results (or exceptions)
-                # We don't strictly need the results here, just the execution
-                futures = [executor.submit(self.process_image, img_path) for img_path in image_files]
-                # Wait for all tasks to complete
-                for future in futures:
-                     try:
-                         future.result() # Check for exceptions raised within threads
-                     except Exception as e:
-                         # This catches errors *raised* by process_image, not those put in queue
-                         print(f"\nError during thread execution: {e}", file=sys.stderr)
-                         if self.status["error"] is None: self.status["error"] = str(e)
-
-
-            # Signal completion to status updater *after* all tasks are submitted and done
+            in_flight = threading.Semaphore(MAX_IN_FLIGHT)
+            countdown_lock = threading.Lock()
+
+            def on_copy_done(future, plan_future, img_path, remaining):
+                try:
+                    future.result() # Check for exceptions raised within threads
+                except Exception as e:
+                    # This catches errors *raised* by a copy task, not those it records itself
+                    print(f"\nError during thread execution: {e}", file=sys.stderr)
+                    if self.status["error"] is None: self.status["error"] = str(e)
+                with countdown_lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                if last:
+                    # Every destination is done with this file: count it once and free its slot
+                    plan = plan_future.result()
+                    if plan is not None:
+                        self._record_progress(os.path.basename(img_path), plan[1].st_size)
+                    in_flight.release()
+
+            def copy_task(plan_future, img_path, dest_dir, source):
+                try:
+                    plan = plan_future.result()
+                    if plan is not None: # Planning failures were already recorded
+                        self.copy_to_destination(img_path, dest_dir, *plan, source=source)
+                finally:
+                    source.release()
+
+            # Process files: EXIF parsing, folder naming and hashing fan out on the CPU pool;
+            # each destination drive gets its own small copy pool so drives never wait on each other.
+            # Using 'with' ensures threads are joined (all files done) before proceeding
+            # (the CPU pool is entered first so it outlives the copy workers that submit to it)
+            with ThreadPoolExecutor(max_workers=self.num_workers) as cpu_pool, \
+                 contextlib.ExitStack() as stack:
+                self._cpu_pool = cpu_pool
+                dest_pools = {dest: stack.enter_context(ThreadPoolExecutor(max_workers=IO_WORKERS))
+                              for dest in self.destination_dirs}
+                for img_path, img_stat in image_files:
+                    # Bound how far the scan and EXIF parsing run ahead of the copies;
+                    # futures are only created as capacity frees up
+                    in_flight.acquire()
+                    plan_future = cpu_pool.submit(self.plan_image, img_path, img_stat)
+                    remaining = [len(dest_pools)]
+                    # Opened once, on the first copy that needs it, and shared by every destination
+                    source = SharedSource(img_path, len(dest_pools))
+                    for dest_dir, dest_pool in dest_pools.items():
+                        dest_pool.submit(copy_task, plan_future, img_path, dest_dir, source).add_done_callback(
+                            functools.partial(on_copy_done, plan_future=plan_future, img_path=img_path, remaining=remaining))
+            self._cpu_pool = None
+
+            # Publish the final counters before flagging completion so the UI never sees stale totals
+            self._refresh_status()
+            if self.status["total_files"] == 0:
+                print("No image files found in the source directory.")
+                self.status["current_file"] = ""
             self.status["complete"] = True
 
-            # Wait for the status queue to be fully processed (all updates handled)
-            self.status_queue.join()
+            # Signal the status updater to stop *after* all tasks are done
+            self._status_stop.set()
 
             # If in CLI mode, wait for the status updater thread to finish its final print
             if self.cli_mode:
@@ -718,22 +1946,121 @@ class PhotoBackup:
             # Ensure status is marked complete even on error to stop updater
             self.status["complete"] = True
         finally:
+             # Parsed tags are only needed while files are in flight; drop them to bound memory
+             self.exif_cache.clear()
+             self.meta_cache.clear()
+             self._meta_pool_enabled = False
+             if self._meta_pool is not None:
+                 self._meta_pool.shutdown(wait=False, cancel_futures=True)
+                 self._meta_pool = None
+             self._cpu_pool = None
+             self._sizes_deferred = False
+             if self._should_geocode and self.location_cache:
+                 save_location_cache(self.location_cache)
+             if self.file_cache is not None:
+                 self.file_cache.close()
+                 self.file_cache = None
              # Ensure complete is set true so status endpoint reflects final state
              self.status["complete"] = True
-             # Ensure the status updater thread knows to stop eventually
-             # (it checks self.status['complete'])
+             # Ensure the status updater thread stops even if we bailed out early
+             self._status_stop.set()
 
 
 
+# EXIF worker process state: one PhotoBackup per process, reused for every file it parses
+_worker_backup = None
+
+def _extract_meta_worker(image_path):
+    """Process-pool entry point: (date_str, GPS rationals) for one image."""
+    global _worker_backup
+    if _worker_backup is None:
+        _worker_backup = PhotoBackup()
+    try:
+        return _worker_backup._meta_from_exif(image_path)
+    finally:
+        _worker_backup.exif_cache.clear() # Each file is parsed once; don't hoard tags in the worker
+
+
 # --- UI Specific Code ---
 
+# Longest wait for a queued main-thread call. POSIX signals interrupt the wait, so it can be
+# unbounded there; on Windows a lock wait can't be interrupted by Ctrl+C, which is then handled
+# between waits (within this many seconds)
+MAIN_THREAD_POLL_SECONDS = 2.0 if os.name == 'nt' else None
+
+
 # File dialog helper (Keep as is, only used by UI)
 class FileDialogHelper:
-    # ... (FileDialogHelper class code remains unchanged) ...
+    # Calls that must run on the main thread (AppKit UI), drained by main()'s wait loop.
+    # SimpleQueue.put is reentrant, so a signal handler can push the stop sentinel (None)
+    _main_thread_calls = queue.SimpleQueue()
+    _main_thread_pumping = False
+
+    @classmethod
+    def run_main_thread_calls(cls, timeout=None):
+        """Run one queued main-thread call, waiting up to `timeout` seconds (forever if None) for it.
+
+        Returns False once stop_main_thread_calls() has been called. Main thread only.
+        """
+        cls._main_thread_pumping = True
+        try:
+            item = cls._main_thread_calls.get(timeout=timeout)
+        except queue.Empty:
+            return True
+        if item is None:
+            return False
+        func, future = item
+        try:
+            future.set_result(func())
+        except Exception as e:
+            future.set_exception(e)
+        return True
+
+    @classmethod
+    def stop_main_thread_calls(cls):
+        """Wake run_main_thread_calls() and make it return False. Safe to call from a signal handler."""
+        cls._main_thread_calls.put(None)
+
+    @staticmethod
+    def _get_folder_appkit():
+        """Native folder picker via pyobjc's NSOpenPanel. Must run on the main thread."""
+        from AppKit import NSApplication, NSOpenPanel, NSModalResponseOK
+        app = NSApplication.sharedApplication()
+        app.activateIgnoringOtherApps_(True) # Bring the panel in front of the browser
+        panel = NSOpenPanel.openPanel()
+        panel.setCanChooseDirectories_(True)
+        panel.setCanChooseFiles_(False)
+        panel.setAllowsMultipleSelection_(False)
+        if panel.runModal() == NSModalResponseOK:
+            return str(panel.URLs()[0].path())
+        return None # Cancelled
+
+    # Server requests are concurrent now; only one folder dialog at a time
+    _dialog_lock = threading.Lock()
+
     @staticmethod
     def get_folder():
-        # For macOS, we need a workaround to run Tkinter on the main thread
+        with FileDialogHelper._dialog_lock:
+            return FileDialogHelper._get_folder()
+
+    @staticmethod
+    def _get_folder():
+        # For macOS, we need a workaround to run the dialog on the main thread
         if platform.system() == 'Darwin':
+            # Preferred: AppKit's own panel in this process (pyobjc), no interpreter start-up.
+            # Requests arrive on server threads, so the call is handed to main()'s loop.
+            if importlib.util.find_spec("AppKit") is not None:
+                try:
+                    if threading.current_thread() is threading.main_thread():
+                        return FileDialogHelper._get_folder_appkit()
+                    if FileDialogHelper._main_thread_pumping:
+                        future = Future()
+                        FileDialogHelper._main_thread_calls.put((FileDialogHelper._get_folder_appkit, future))
+                        return future.result()
+                except Exception as e:
+                    print(f"Warning: Native folder dialog failed ({e}). Falling back to Tkinter.")
+
+            # Fallback: Tkinter in a subprocess, which gets its own main thread
             import subprocess
             script = """
 import tkinter as tk
@@ -800,9 +2127,39 @@ class PhotoBackupServer:
         self.backup.append_location = self.config.get("append_location", True)
         self.backup.folder_suffix = self.config.get("folder_suffix", "")
 
+        # Web UI files, read once and served from memory
+        self.static_files = self.load_static_files()
+
         self.server = None
         self.thread = None
 
+    @staticmethod
+    def load_static_files():
+        """Map URL path -> (body, gzipped body, content type, ETag) for every file in the web directory."""
+        web_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'web')
+        static_files = {}
+        try:
+            entries = list(os.scandir(web_dir))
+        except OSError as e:
+            print(f"Warning: Could not read web directory {web_dir}: {e}")
+            return static_files
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            try:
+                with open(entry.path, 'rb') as f:
+                    body = f.read()
+            except OSError as e:
+                print(f"Warning: Could not load {entry.path}: {e}")
+                continue # Left to the on-disk handler
+            content_type = mimetypes.guess_type(entry.name)[0] or 'application/octet-stream'
+            if content_type.startswith('text/') or content_type == 'application/javascript':
+                content_type += '; charset=utf-8'
+            # Compressed once here rather than per request; the UI's text files shrink ~70%
+            static_files['/' + entry.name] = (body, gzip.compress(body, compresslevel=9),
+                                              content_type, hashlib.md5(body).hexdigest())
+        return static_files
+
     def find_free_port(self):
         """Find an available port to use"""
         with socketserver.TCPServer(("localhost", 0), None) as s:
@@ -814,10 +2171,10 @@ class PhotoBackupServer:
             self.port = self.find_free_port()
 
         handler = self.create_request_handler()
-        # Allow address reuse
-        socketserver.TCPServer.allow_reuse_address = True
         try:
-            self.server = socketserver.TCPServer(("", self.port), handler)
+            # One thread per request (HTTPServer already allows address reuse), so a long
+            # folder dialog or a slow client never holds up /status polling
+            self.server = http.server.ThreadingHTTPServer(("", self.port), handler)
         except OSError as e:
             print(f"Error starting server on port {self.port}: {e}", file=sys.stderr)
             print("The port might be in use. Try stopping other instances or choose a different port.")
@@ -830,17 +2187,21 @@ class PhotoBackupServer:
 
         print(f"\nPhoto Backup Tool UI is running!")
         print(f"Attempting to open browser at: http://localhost:{self.port}")
-        # Give server a moment to start before opening browser
-        time.sleep(0.5)
+        # No need to wait: the constructor already bound and is listening, so the browser's
+        # first connection just queues until serve_forever picks it up. Launching the browser
+        # can block for a while, so it runs off the main thread
+        threading.Thread(target=self.open_browser, daemon=True).start()
+
+        return self.port
+
+    def open_browser(self):
+        """Open the UI in the default web browser, printing the URL if that fails"""
         try:
             webbrowser.open(f"http://localhost:{self.port}")
         except Exception as e:
              print(f"Could not automatically open web browser: {e}")
              print(f"Please open it manually: http://localhost:{self.port}")
 
-
-        return self.port
-
     def stop_server(self):
         """Stop the web server"""
         if self.server:
@@ -856,11 +2217,18 @@ class PhotoBackupServer:
         """Create a request handler for the web server"""
         backup_instance = self.backup
         config_dict = self.config
+        static_files = self.static_files
+        start_lock = threading.Lock() # Requests now run concurrently: one check-and-start at a time
+        backup_thread = [None]
+        status_body = [None, b''] # (status version, encoded JSON) shared by all requests
         # server_ref = self # Not strictly needed anymore
 
         class PhotoBackupHandler(http.server.SimpleHTTPRequestHandler):
             # Ensure web files are served from correct dir relative to script
             web_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'web')
+            # Resolved once; every static path must stay under it (trailing sep so 'web2/' can't match)
+            web_dir_abs = os.path.abspath(web_dir)
+            web_dir_prefix = os.path.join(web_dir_abs, '')
 
             def __init__(self, *args, **kwargs):
                 # Serve files from the 'web' subdirectory
@@ -869,22 +2237,33 @@ class PhotoBackupServer:
             # --- GET handlers ---
             def do_GET(self):
                 if self.path == '/':
-                    self.path = '/index.html'
-                    # Check if index.html exists
-                    if not os.path.exists(os.path.join(self.web_dir, 'index.html')):
-                         self.send_error(404, "Error: index.html not found in web directory.")
-                         return
+                    self.path = '/index.html' # Checked with the other static files below
 
                 elif self.path == '/status':
+                    # The status version doubles as ETag: unchanged polls get an empty 304,
+                    # and each version is serialized once however many clients poll it
+                    version = backup_instance.status.version
+                    etag = f'"{version}"'
+                    if self.headers.get('If-None-Match') == etag:
+                        self.send_response(304)
+                        self.send_header('ETag', etag)
+                        self.send_header('Cache-Control', 'no-cache') # Always revalidate
+                        self.end_headers()
+                        return
+                    cached_version, body = status_body
+                    if cached_version != version:
+                        # Ensure status is JSON serializable (basic types)
+                        version, safe_status = backup_instance.status.snapshot()
+                        etag = f'"{version}"'
+                        body = json_bytes(safe_status)
+                        status_body[:] = [version, body] # Racing requests both store a valid pair
                     self.send_response(200)
                     self.send_header('Content-type', 'application/json')
-                    self.send_header('Cache-Control', 'no-cache') # Prevent caching of status
+                    self.send_header('Content-Length', str(len(body)))
+                    self.send_header('ETag', etag)
+                    self.send_header('Cache-Control', 'no-cache') # Browser may store it but must revalidate
                     self.end_headers()
-                    # Ensure status is JSON serializable (basic types)
-                    safe_status = backup_instance.status.copy()
-                    # Convert non-serializable types if necessary (e.g., custom objects)
-                    # For this script, the status dict seems okay.
-                    self.wfile.write(json.dumps(safe_status).encode('utf-8'))
+                    self.wfile.write(body)
                     return
 
                 elif self.path == '/browse-source' or self.path == '/browse-destination':
@@ -893,45 +2272,76 @@ class PhotoBackupServer:
                     result = {'path': folder if folder else ''} # Send empty string if cancelled
 
                     # If browsing source and a folder was selected, update config
+                    # (persisted by /start-backup; a browsed folder is only a draft until then)
                     if self.path == '/browse-source' and folder:
                         config_dict["source"] = folder
                         backup_instance.source_dir = folder # Update instance too
-                        save_config(config_dict) # Save immediately
 
                     self.send_response(200)
                     self.send_header('Content-type', 'application/json')
                     self.end_headers()
-                    self.wfile.write(json.dumps(result).encode('utf-8'))
+                    self.wfile.write(json_bytes(result))
                     return
 
                 elif self.path == '/get-config':
                     self.send_response(200)
                     self.send_header('Content-type', 'application/json')
                     self.end_headers()
-                    self.wfile.write(json.dumps(config_dict).encode('utf-8'))
+                    self.wfile.write(json_bytes(config_dict))
                     return
 
-                # Fallback to SimpleHTTPRequestHandler for static files (index.html, css, js)
-                # Check if requested file exists in web dir
+                # Static files preloaded at startup: no disk access at all
+                static = static_files.get(self.path)
+                if static is not None:
+                    body, gz_body, content_type, digest = static
+                    use_gzip = 'gzip' in self.headers.get('Accept-Encoding', '')
+                    if use_gzip:
+                        body = gz_body
+                    # Each encoding is its own representation, so it gets its own ETag
+                    etag = f'"{digest}-gz"' if use_gzip else f'"{digest}"'
+                    if self.headers.get('If-None-Match') == etag:
+                        self.send_response(304)
+                        self.send_header('ETag', etag)
+                        self.send_header('Cache-Control', 'no-cache')
+                        self.send_header('Vary', 'Accept-Encoding')
+                        self.end_headers()
+                        return
+                    self.send_response(200)
+                    self.send_header('Content-type', content_type)
+                    self.send_header('Content-Length', str(len(body)))
+                    if use_gzip:
+                        self.send_header('Content-Encoding', 'gzip')
+                    self.send_header('ETag', etag)
+                    # Revalidated on every load (an empty 304 while unchanged), so an updated
+                    # page or script never runs stale against the new server
+                    self.send_header('Cache-Control', 'no-cache')
+                    self.send_header('Vary', 'Accept-Encoding')
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+
+                # Anything else: SimpleHTTPRequestHandler from the web dir
                 # self.path includes the leading '/'
-                requested_path = os.path.abspath(os.path.join(self.web_dir, self.path.lstrip('/')))
-                if not requested_path.startswith(os.path.abspath(self.web_dir)):
+                requested_path = os.path.normpath(os.path.join(self.web_dir_abs, self.path.lstrip('/')))
+                if not requested_path.startswith(self.web_dir_prefix):
                     self.send_error(403, "Forbidden") # Prevent directory traversal
                     return
-                if not os.path.exists(requested_path) or not os.path.isfile(requested_path):
-                     # If it's not a known API endpoint or an existing file, return 404
-                     # This prevents errors if browser requests e.g. /favicon.ico
-                     # Keep this check *after* API endpoints
-                     if self.path not in ['/status', '/browse-source', '/browse-destination', '/get-config', '/start-backup', '/save-config']:
-                         # self.send_error(404, "File not found")
-                         # Silently ignore requests for non-existent files like favicon.ico
-                         # To avoid console noise. Send a minimal response.
-                         self.send_response(404)
-                         self.send_header('Content-type', 'text/plain')
-                         self.end_headers()
-                         self.wfile.write(b'Not Found')
+                # One stat answers both "exists" and "is a regular file"
+                try:
+                    is_file = stat.S_ISREG(os.stat(requested_path).st_mode)
+                except OSError: # Missing, unreadable, bad name...
+                    is_file = False
+                if not is_file:
+                     if self.path == '/index.html':
+                         self.send_error(404, "Error: index.html not found in web directory.")
                          return
-                     # Else, it might be a POST request handled below, let it pass
+                     # Silently ignore requests for non-existent files like favicon.ico
+                     # To avoid console noise. Send a minimal response.
+                     self.send_response(404)
+                     self.send_header('Content-type', 'text/plain')
+                     self.end_headers()
+                     self.wfile.write(b'Not Found')
+                     return
 
                 # Serve static file using parent class method
                 try:
@@ -951,8 +2361,8 @@ class PhotoBackupServer:
                     if content_length == 0:
                         self.send_error(400, "Bad Request: Content-Length required")
                         return
-                    post_data = self.rfile.read(content_length).decode('utf-8')
-                    data = json.loads(post_data)
+                    post_data = self.rfile.read(content_length)
+                    data = json_from_bytes(post_data)
                 except json.JSONDecodeError:
                     self.send_error(400, "Bad Request: Invalid JSON")
                     return
@@ -972,7 +2382,7 @@ class PhotoBackupServer:
                             self.send_response(400)
                             self.send_header('Content-type', 'application/json')
                             self.end_headers()
-                            self.wfile.write(json.dumps({'status': 'error', 'message': 'Missing source or destinations'}).encode('utf-8'))
+                            self.wfile.write(json_bytes({'status': 'error', 'message': 'Missing source or destinations'}))
                             return
 
                         backup_instance.source_dir = source
@@ -989,25 +2399,27 @@ class PhotoBackupServer:
 
                         # Start backup in a separate thread so HTTP request returns immediately
                         # Check if already running? Maybe prevent concurrent runs from UI.
-                        if backup_instance.status.get("start_time", 0) > 0 and not backup_instance.status.get("complete", True):
-                             self.send_response(409) # Conflict
-                             self.send_header('Content-type', 'application/json')
-                             self.end_headers()
-                             self.wfile.write(json.dumps({'status': 'error', 'message': 'Backup already in progress'}).encode('utf-8'))
-                             return
-
-
-                        threading.Thread(target=backup_instance.backup_images, daemon=True).start()
+                        with start_lock:
+                            running = backup_thread[0] is not None and backup_thread[0].is_alive()
+                            if running or (backup_instance.status.get("start_time", 0) > 0 and not backup_instance.status.get("complete", True)):
+                                 self.send_response(409) # Conflict
+                                 self.send_header('Content-type', 'application/json')
+                                 self.end_headers()
+                                 self.wfile.write(json_bytes({'status': 'error', 'message': 'Backup already in progress'}))
+                                 return
+
+                            backup_thread[0] = threading.Thread(target=backup_instance.backup_images, daemon=True)
+                            backup_thread[0].start()
 
                         self.send_response(200)
                         self.send_header('Content-type', 'application/json')
                         self.end_headers()
-                        self.wfile.write(json.dumps({'status': 'started'}).encode('utf-8'))
+                        self.wfile.write(json_bytes({'status': 'started'}))
                     except Exception as e:
                          self.send_response(500)
                          self.send_header('Content-type', 'application/json')
                          self.end_headers()
-                         self.wfile.write(json.dumps({'status': 'error', 'message': f'Failed to start backup: {e}'}).encode('utf-8'))
+                         self.wfile.write(json_bytes({'status': 'error', 'message': f'Failed to start backup: {e}'}))
                     return
 
                 # Removed /save-config endpoint as config is saved on browse/start
@@ -1017,7 +2429,7 @@ class PhotoBackupServer:
                 self.send_response(404)
                 self.send_header('Content-type', 'application/json')
                 self.end_headers()
-                self.wfile.write(json.dumps({'status': 'error', 'message': 'Endpoint not found'}).encode('utf-8'))
+                self.wfile.write(json_bytes({'status': 'error', 'message': 'Endpoint not found'}))
 
 
             # Override log message to reduce noise or customize format
@@ -1031,847 +2443,19 @@ class PhotoBackupServer:
         return PhotoBackupHandler
 
 
-# Create the web interface files (only if needed)
-def create_web_files():
-    """Creates the necessary HTML, CSS, JS files in a 'web' subdirectory."""
+# Web interface files, shipped next to this script in 'web/'
+WEB_FILES = ('index.html', 'styles.css', 'scripts.js')
+
+def check_web_files():
+    """Checks the web interface files are present in the 'web' subdirectory.
+       They are served as-is (see PhotoBackupServer.load_static_files), nothing is written."""
     web_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'web')
-    os.makedirs(web_dir, exist_ok=True)
-    print("Ensuring web interface files exist...")
-
-    # --- index.html ---
-    # Added logic to disable suffix input when location is checked
-    index_html_content = '''<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Photo Backup Tool</title>
-    <link rel="stylesheet" href="styles.css">
-</head>
-<body>
-    <div class="container">
-        <h1>Photo Backup Tool</h1>
-
-        <div class="setup-panel">
-            <div class="form-group">
-                <label for="source-folder">Source Folder:</label>
-                <div class="input-with-button">
-                    <input type="text" id="source-folder" placeholder="Select source folder" readonly>
-                    <button id="browse-source">Browse</button>
-                </div>
-            </div>
-
-            <div class="form-group">
-                <label>Destination Folders:</label>
-                <div id="destinations-container">
-                    <!-- Destination rows added dynamically -->
-                </div>
-                <button id="add-destination">Add Another Destination</button>
-            </div>
-
-            <fieldset class="form-group naming-options">
-                <legend>Folder Naming Options:</legend>
-                <div class="radio-group">
-                    <label class="radio-label">
-                        <input type="radio" name="naming_option" id="append-location" value="location" checked>
-                        Date + Location <small>(Needs Internet/GPS)</small>
-                    </label>
-                </div>
-                 <div class="radio-group">
-                    <label class="radio-label">
-                        <input type="radio" name="naming_option" id="use-suffix" value="suffix">
-                        Date + Custom Suffix
-                    </label>
-                    <input type="text" id="folder-suffix" placeholder="Enter custom suffix" disabled>
-                 </div>
-                 <div class="radio-group">
-                     <label class="radio-label">
-                         <input type="radio" name="naming_option" id="date-only" value="date">
-                         Date Only
-                     </label>
-                 </div>
-            </fieldset>
-
-
-            <button id="start-backup" class="primary-button">Start Backup</button>
-        </div>
-
-        <div class="progress-panel" style="display: none;">
-            <h2>Backup Progress</h2>
-
-            <div class="progress-container">
-                <div class="progress-bar">
-                    <div class="progress-fill"></div>
-                </div>
-                <div class="progress-text">0%</div>
-            </div>
-
-            <p><strong>Status:</strong> <span id="status-message">Initializing...</span></p>
-
-            <div class="progress-details">
-                <p>Current file: <span id="current-file">-</span></p>
-                <p>Files: <span id="processed-files">0</span>/<span id="total-files">0</span></p>
-                <p>Size: <span id="processed-size">0 MB</span>/<span id="total-size">0 MB</span></p>
-                <p>Estimated time remaining: <span id="time-remaining">Calculating...</span></p>
-            </div>
-
-            <div class="completion-message" style="display: none;">
-                <p>✅ Backup completed successfully!</p>
-                <button id="new-backup" class="primary-button">Start New Backup</button>
-            </div>
-
-            <div class="error-message" style="display: none;">
-                <p>❌ Error: <span id="error-text"></span></p>
-                <button id="try-again" class="primary-button">Configure New Backup</button> <!-- Changed text -->
-            </div>
-        </div>
-    </div>
-
-    <script src="scripts.js"></script>
-</body>
-</html>'''
-    with open(os.path.join(web_dir, 'index.html'), 'w', encoding='utf-8') as f:
-        f.write(index_html_content)
-
-    # --- styles.css ---
-    # Minor style adjustments for radio buttons/fieldset
-    styles_css_content = '''* {
-    box-sizing: border-box;
-    margin: 0;
-    padding: 0;
-    font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, Helvetica, Arial, sans-serif;
-}
-
-body {
-    background-color: #f5f5f7;
-    color: #333;
-    line-height: 1.6;
-    padding-bottom: 50px; /* Ensure content doesn't touch bottom */
-}
-
-.container {
-    max-width: 700px; /* Slightly narrower */
-    margin: 30px auto; /* Reduced top margin */
-    padding: 20px;
-    background-color: white;
-    border-radius: 12px;
-    box-shadow: 0 4px Gist Coplot20px rgba(0, 0, 0, 0.08);
-}
-
-h1 {
-    text-align: center;
-    margin-bottom: 25px;
-    color: #1d1d1f;
-    font-size: 1.8em;
-}
-
-h2 {
-    margin-bottom: 15px;
-    color: #1d1d1f;
-    font-size: 1.4em;
-    border-bottom: 1px solid #eee;
-    padding-bottom: 10px;
-}
-
-.setup-panel, .progress-panel {
-    padding: 20px;
-    margin-bottom: 20px;
-}
-
-.form-group {
-    margin-bottom: 20px;
-}
-.form-group:last-child {
-    margin-bottom: 0;
-}
-
-
-label {
-    display: block;
-    margin-bottom: 6px;
-    font-weight: 500;
-    font-size: 0.95em;
-}
-
-.input-with-button {
-    display: flex;
-    width: 100%;
-}
-
-input[type="text"], input[type="text"]:read-only {
-    flex-grow: 1;
-    padding: 10px 12px; /* Slightly smaller padding */
-    border: 1px solid #ccc;
-    border-radius: 6px;
-    background-color: #fff; /* White background */
-    font-size: 0.95em;
-    color: #333;
-}
-input[type="text"]:read-only {
-     background-color: #f8f8f8; /* Slightly grey for readonly */
-     cursor: default;
-}
-
-
-button {
-    padding: 10px 18px; /* Adjust padding */
-    background-color: #e9e9ed; /* Lighter grey */
-    color: #333;
-    border: 1px solid #ccc;
-    border-left: none;
-    border-radius: 0 6px 6px 0;
-    cursor: pointer;
-    transition: background-color 0.2s;
-    font-size: 0.9em;
-    white-space: nowrap; /* Prevent browse button text wrapping */
-}
-button:hover {
-    background-color: #dcdce1;
-}
-
-.primary-button {
-    display: block;
-    width: 100%;
-    padding: 12px 20px;
-    background-color: #0071e3;
-    color: white;
-    border: none;
-    border-radius: 6px;
-    font-size: 1em;
-    font-weight: 500;
-    cursor: pointer;
-    transition: background-color 0.2s;
-    margin-top: 15px; /* Space above primary button */
-}
-.primary-button:hover {
-    background-color: #0077ed;
-}
-.primary-button:disabled {
-    background-color: #a0cffc; /* Lighter blue when disabled */
-    cursor: not-allowed;
-}
-
-
-.destination-row {
-    display: flex;
-    align-items: center;
-    margin-bottom: 10px;
-}
-.destination-row:last-child {
-     margin-bottom: 0;
-}
-
-.remove-destination {
-    margin-left: 8px;
-    width: 32px; /* Smaller remove button */
-    height: 32px;
-    display: flex;
-    align-items: center;
-    justify-content: center;
-    border-radius: 50%;
-    background-color: #ff5c5c; /* Adjusted red */
-    color: white;
-    font-size: 16px; /* Smaller X */
-    font-weight: bold;
-    border: none;
-    cursor: pointer;
-    transition: background-color 0.2s;
-    flex-shrink: 0; /* Prevent shrinking */
-    padding: 0; /* Reset padding */
-}
-.remove-destination:hover {
-    background-color: #ff3b30;
-}
-
-#add-destination {
-    border-radius: 6px;
-    border: 1px solid #ccc;
-    background-color: #f8f8f8;
-    width: auto;
-    padding: 8px 15px;
-    font-size: 0.9em;
-    margin-top: 8px; /* Space above add button */
-    border-left: 1px solid #ccc; /* Add left border back */
-}
-#add-destination:hover {
-     background-color: #eee;
-}
-
-
-/* Naming Options */
-.naming-options {
-    border: 1px solid #eee;
-    border-radius: 6px;
-    padding: 15px;
-    margin-top: 10px;
-}
-.naming-options legend {
-    font-weight: 500;
-    padding: 0 5px;
-    font-size: 0.95em;
-}
-.radio-group {
-    display: flex;
-    align-items: center;
-    margin-bottom: 10px;
-    gap: 8px; /* Space between radio and label/input */
-}
-.radio-group:last-child {
-     margin-bottom: 0;
-}
-.radio-label {
-    display: flex; /* Use flex for alignment */
-    align-items: center;
-    gap: 6px; /* Space between radio button and text */
-    margin-bottom: 0; /* Remove default label margin */
-    cursor: pointer;
-    font-weight: normal; /* Normal weight for radio labels */
-    font-size: 0.95em;
-}
-.radio-label input[type="radio"] {
-    margin-right: 4px; /* Small space */
-    flex-shrink: 0;
-     /* Custom styling could go here */
-}
-.radio-label small {
-     color: #666;
-     font-size: 0.85em;
-}
-#folder-suffix {
-    margin-left: 5px; /* Space after radio group */
-    max-width: 200px; /* Limit width */
-    flex-grow: 0; /* Don't let it grow too much */
-    padding: 8px 10px; /* Smaller padding */
-    font-size: 0.9em;
-}
-#folder-suffix:disabled {
-    background-color: #f0f0f0;
-    cursor: not-allowed;
-    border-color: #ddd;
-}
-
-
-/* Progress Panel */
-.progress-container {
-    display: flex;
-    align-items: center;
-    margin-bottom: 15px;
-    gap: 15px;
-}
-
-.progress-bar {
-    flex-grow: 1;
-    height: 12px; /* Slightly thicker bar */
-    background-color: #e9e9ed;
-    border-radius: 6px;
-    overflow: hidden;
-}
-
-.progress-fill {
-    height: 100%;
-    background-color: #0071e3;
-    width: 0%;
-    transition: width 0.2s ease-out; /* Faster transition */
-    border-radius: 6px; /* Match parent */
-}
-
-.progress-text {
-    font-weight: 500;
-    min-width: 50px; /* Ensure space for 100.0% */
-    text-align: right;
-    font-size: 0.95em;
-}
-
-#status-message {
-    font-weight: 500;
-    margin-bottom: 15px;
-    display: block; /* Make it block level */
-}
-
-.progress-details {
-    font-size: 0.9em;
-    color: #555;
-    margin-bottom: 15px;
-    padding-left: 5px; /* Indent details slightly */
-}
-.progress-details p {
-    margin-bottom: 6px;
-    display: flex;
-    justify-content: space-between; /* Align text left/right */
-    gap: 10px; /* Space between label and value */
-}
-.progress-details p span {
-    text-align: right; /* Align values to the right */
-    min-width: 80px; /* Give space for values */
-}
-
-
-.completion-message, .error-message {
-    text-align: center;
-    padding: 20px 0 10px 0; /* Adjust padding */
-}
-
-.completion-message p {
-    color: #34c759;
-    font-weight: 500;
-    font-size: 1.2em; /* Slightly larger */
-    margin-bottom: 15px;
-}
-
-.error-message p {
-    color: #ff3b30;
-    font-weight: 500;
-    font-size: 1.1em;
-    margin-bottom: 15px;
-}
-.error-message span {
-     display: block; /* Put error text on new line */
-     font-weight: normal;
-     font-size: 0.95em;
-     margin-top: 5px;
-     max-height: 100px; /* Limit error display height */
-     overflow-y: auto; /* Allow scrolling for long errors */
-     background-color: #fff0f0; /* Light red background */
-     padding: 5px;
-     border-radius: 4px;
-     border: 1px solid #ffcccc;
-}
-
-
-#new-backup, #try-again {
-    max-width: 250px; /* Wider button */
-    margin: 0 auto;
-}'''
-    with open(os.path.join(web_dir, 'styles.css'), 'w', encoding='utf-8') as f:
-        f.write(styles_css_content)
-
-    # --- scripts.js ---
-    # Updated to handle radio buttons for naming, add/remove logic, reset state
-    scripts_js_content = '''document.addEventListener('DOMContentLoaded', function() {
-    // Elements
-    const sourceFolderInput = document.getElementById('source-folder');
-    const browseSourceButton = document.getElementById('browse-source');
-    const destinationsContainer = document.getElementById('destinations-container');
-    const addDestinationButton = document.getElementById('add-destination');
-    const startBackupButton = document.getElementById('start-backup');
-
-    // Naming options elements
-    const appendLocationRadio = document.getElementById('append-location');
-    const useSuffixRadio = document.getElementById('use-suffix');
-    const dateOnlyRadio = document.getElementById('date-only');
-    const folderSuffixInput = document.getElementById('folder-suffix');
-    const namingOptionRadios = document.querySelectorAll('input[name="naming_option"]');
-
-    // Panels and Progress elements
-    const setupPanel = document.querySelector('.setup-panel');
-    const progressPanel = document.querySelector('.progress-panel');
-    const progressFill = document.querySelector('.progress-fill');
-    const progressText = document.querySelector('.progress-text');
-    const statusMessage = document.getElementById('status-message');
-    const currentFileSpan = document.getElementById('current-file');
-    const processedFilesSpan = document.getElementById('processed-files');
-    const totalFilesSpan = document.getElementById('total-files');
-    const processedSizeSpan = document.getElementById('processed-size');
-    const totalSizeSpan = document.getElementById('total-size');
-    const timeRemainingSpan = document.getElementById('time-remaining');
-    const completionMessageDiv = document.querySelector('.completion-message');
-    const errorMessageDiv = document.querySelector('.error-message');
-    const errorTextSpan = document.getElementById('error-text');
-    const newBackupButton = document.getElementById('new-backup');
-    const tryAgainButton = document.getElementById('try-again'); // Renamed from 'try-again' in HTML logic
-
-    let statusInterval = null; // To store the interval ID for polling
-
-    // --- Initial Setup ---
-
-    // Function to format bytes to MB/GB etc.
-    function formatBytes(bytes, decimals = 1) {
-        if (bytes === 0) return '0 Bytes';
-        const k = 1024;
-        const dm = decimals < 0 ? 0 : decimals;
-        const sizes = ['Bytes', 'KB', 'MB', 'GB', 'TB'];
-        const i = Math.floor(Math.log(bytes) / Math.log(k));
-        return parseFloat((bytes / Math.pow(k, i)).toFixed(dm)) + ' ' + sizes[i];
-    }
-
-    // Function to add a destination row
-    function addDestinationRow(folderPath = '') {
-        const row = document.createElement('div');
-        row.className = 'destination-row';
-
-        row.innerHTML = `
-            <div class="input-with-button">
-                <input type="text" class="destination-folder" placeholder="Select destination folder" readonly>
-                <button class="browse-destination">Browse</button>
-            </div>
-            <button class="remove-destination" aria-label="Remove destination">×</button>
-        `;
-
-        destinationsContainer.appendChild(row);
-        const input = row.querySelector('.destination-folder');
-        if (folderPath) {
-            input.value = folderPath;
-        }
-
-        // Add event listeners to new buttons
-        row.querySelector('.browse-destination').addEventListener('click', browseDestination);
-        row.querySelector('.remove-destination').addEventListener('click', function() {
-            destinationsContainer.removeChild(row);
-            updateRemoveButtonsVisibility();
-        });
-
-        updateRemoveButtonsVisibility();
-    }
-
-    // Function to update visibility of remove buttons
-    function updateRemoveButtonsVisibility() {
-        const rows = destinationsContainer.querySelectorAll('.destination-row');
-        rows.forEach((row, index) => {
-            const removeButton = row.querySelector('.remove-destination');
-            if (rows.length > 1) {
-                removeButton.style.display = 'flex'; // Use flex to match CSS
-            } else {
-                removeButton.style.display = 'none';
-            }
-        });
-        // Add a default row if none exist after removal
-        if (rows.length === 0) {
-             addDestinationRow();
-        }
-    }
-
-     // Function to reset the UI to the initial setup state
-    function resetUI() {
-        // Stop polling if active
-        if (statusInterval) {
-            clearInterval(statusInterval);
-            statusInterval = null;
-        }
-
-        // Show setup, hide progress
-        setupPanel.style.display = 'block';
-        progressPanel.style.display = 'none';
-        completionMessageDiv.style.display = 'none';
-        errorMessageDiv.style.display = 'none';
-
-        // Reset progress indicators
-        progressFill.style.width = '0%';
-        progressText.textContent = '0%';
-        statusMessage.textContent = 'Initializing...';
-        currentFileSpan.textContent = '-';
-        processedFilesSpan.textContent = '0';
-        totalFilesSpan.textContent = '0';
-        processedSizeSpan.textContent = '0 MB';
-        totalSizeSpan.textContent = '0 MB';
-        timeRemainingSpan.textContent = 'Calculating...';
-        errorTextSpan.textContent = '';
-
-        // Re-enable start button
-        startBackupButton.disabled = false;
-
-        // Don't clear source/destination inputs, keep config values
-        // But maybe reload config in case it changed elsewhere?
-        // loadConfig(); // Optional: reload config state
-    }
-
-
-    // --- Event Listeners ---
-
-    browseSourceButton.addEventListener('click', function() {
-        // Disable button temporarily to prevent double clicks
-        browseSourceButton.disabled = true;
-        fetch('/browse-source')
-            .then(response => response.ok ? response.json() : Promise.reject('Network error'))
-            .then(data => {
-                if (data && data.path) {
-                    sourceFolderInput.value = data.path;
-                } else if (data && data.path === '') {
-                     // User cancelled - do nothing, keep existing value
-                } else {
-                     console.warn("Browse source failed or returned unexpected data:", data);
-                }
-            })
-            .catch(err => console.error('Error browsing source:', err))
-            .finally(() => {
-                browseSourceButton.disabled = false; // Re-enable button
-            });
-    });
-
-    addDestinationButton.addEventListener('click', () => addDestinationRow());
-
-    // Use event delegation for destination browse buttons
-    destinationsContainer.addEventListener('click', function(event) {
-        if (event.target.classList.contains('browse-destination')) {
-            browseDestination.call(event.target); // Call browseDestination with the button as 'this'
-        }
-    });
-
-    // Handler for browsing destination (needs to know which input to update)
-    function browseDestination() {
-        const button = this; // 'this' is the clicked button
-        const input = button.closest('.destination-row').querySelector('.destination-folder');
-
-        button.disabled = true; // Disable button temporarily
-
-        fetch('/browse-destination')
-            .then(response => response.ok ? response.json() : Promise.reject('Network error'))
-            .then(data => {
-                if (data && data.path) {
-                    input.value = data.path;
-                    // Optionally save config here if desired
-                    // saveCurrentConfig();
-                } else if (data && data.path === '') {
-                    // User cancelled
-                } else {
-                    console.warn("Browse destination failed or returned unexpected data:", data);
-                }
-            })
-            .catch(err => console.error('Error browsing destination:', err))
-            .finally(() => {
-                 button.disabled = false; // Re-enable button
-            });
-    }
-
-    // Event listeners for naming option radio buttons
-    namingOptionRadios.forEach(radio => {
-        radio.addEventListener('change', handleNamingOptionChange);
-    });
-
-    function handleNamingOptionChange() {
-         if (useSuffixRadio.checked) {
-            folderSuffixInput.disabled = false;
-            folderSuffixInput.focus();
-         } else {
-             folderSuffixInput.disabled = true;
-             folderSuffixInput.value = ''; // Clear suffix if not used
-         }
-         // Maybe save config preference immediately?
-         // saveCurrentConfig();
-    }
-
-    // Start Backup Button
-    startBackupButton.addEventListener('click', function() {
-        // Validate inputs
-        const source = sourceFolderInput.value.trim();
-        if (!source) {
-            alert('Please select a source folder.');
-            return;
-        }
-
-        const destinations = Array.from(destinationsContainer.querySelectorAll('.destination-folder'))
-                                 .map(input => input.value.trim())
-                                 .filter(path => path !== ''); // Get non-empty, trimmed paths
-
-        if (destinations.length === 0) {
-            alert('Please select at least one valid destination folder.');
-            return;
-        }
-
-        // Determine naming options
-        let appendLoc = false;
-        let folderSfx = '';
-        if (appendLocationRadio.checked) {
-            appendLoc = true;
-        } else if (useSuffixRadio.checked) {
-            appendLoc = false;
-            folderSfx = folderSuffixInput.value.trim();
-             if (!folderSfx) {
-                 alert('Please enter a custom suffix or choose another naming option.');
-                 folderSuffixInput.focus();
-                 return;
-             }
-        } else { // Date Only
-             appendLoc = false;
-             folderSfx = '';
-        }
-
-
-        // Disable button, show progress panel
-        startBackupButton.disabled = true;
-        setupPanel.style.display = 'none';
-        progressPanel.style.display = 'block';
-        completionMessageDiv.style.display = 'none';
-        errorMessageDiv.style.display = 'none';
-        statusMessage.textContent = 'Starting backup...';
-
-        // Prepare data payload
-        const backupData = {
-            source: source,
-            destinations: destinations,
-            append_location: appendLoc,
-            folder_suffix: folderSfx
-        };
-
-        // Start backup via POST request
-        fetch('/start-backup', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-                'Accept': 'application/json' // Expect JSON back
-            },
-            body: JSON.stringify(backupData)
-        })
-        .then(response => {
-            if (!response.ok) {
-                // Try to get error message from response body
-                return response.json().then(errData => {
-                   throw new Error(errData.message || `HTTP error! Status: ${response.status}`);
-                }).catch(() => {
-                   // If body cannot be parsed or no message, throw generic error
-                   throw new Error(`HTTP error! Status: ${response.status}`);
-                });
-            }
-            return response.json();
-        })
-        .then(data => {
-            if (data.status === 'started') {
-                statusMessage.textContent = 'Backup in progress...';
-                // Start polling for status updates
-                pollStatus();
-            } else {
-                 // Should not happen if response was ok, but handle defensively
-                 throw new Error(data.message || 'Failed to start backup.');
-            }
-        })
-        .catch(error => {
-            console.error('Error starting backup:', error);
-            statusMessage.textContent = 'Error starting backup.';
-            errorTextSpan.textContent = error.message || 'Unknown error occurred.';
-            errorMessageDiv.style.display = 'block';
-            // Don't reset UI immediately, let user see the error
-            // resetUI(); // Re-enable setup panel on error? Maybe not.
-            startBackupButton.disabled = false; // Re-enable start button on error
-        });
-    });
-
-
-    // New Backup / Try Again Buttons
-    newBackupButton.addEventListener('click', resetUI);
-    tryAgainButton.addEventListener('click', resetUI); // Now just resets to config screen
-
-
-    // --- Status Polling and UI Update ---
-
-    function pollStatus() {
-        // Clear previous interval if any (safety check)
-        if (statusInterval) clearInterval(statusInterval);
-
-        statusInterval = setInterval(() => {
-            fetch('/status')
-                .then(response => {
-                    if (!response.ok) { throw new Error(`Status fetch failed: ${response.status}`); }
-                    return response.json();
-                })
-                .then(status => {
-                    updateProgressUI(status);
-
-                    // Stop polling if complete or error occurred
-                    if (status.complete || status.error) {
-                        clearInterval(statusInterval);
-                        statusInterval = null;
-                        startBackupButton.disabled = false; // Re-enable start button once done/failed
-
-                        if (status.error) {
-                             statusMessage.textContent = 'Backup failed!';
-                             errorTextSpan.textContent = status.error;
-                             errorMessageDiv.style.display = 'block';
-                             completionMessageDiv.style.display = 'none';
-                        } else if (status.complete) {
-                             statusMessage.textContent = 'Backup finished!';
-                             errorMessageDiv.style.display = 'none';
-                             completionMessageDiv.style.display = 'block';
-                        }
-                    }
-                })
-                .catch(error => {
-                    console.error('Error polling status:', error);
-                    statusMessage.textContent = 'Error fetching status.';
-                    // Optionally stop polling on error, or keep trying?
-                    // clearInterval(statusInterval);
-                    // statusInterval = null;
-                    // errorTextSpan.textContent = 'Connection lost or server error.';
-                    // errorMessageDiv.style.display = 'block';
-                });
-        }, 1000); // Poll every 1 second
-    }
-
-    function updateProgressUI(status) {
-        const total = status.total_files || 0;
-        const processed = status.processed_files || 0;
-        const percent = total > 0 ? Math.round((processed / total) * 100) : (status.complete ? 100 : 0);
-
-        progressFill.style.width = `${percent}%`;
-        progressText.textContent = `${percent}%`;
-
-        // Update status message based on state
-        if (status.error) {
-             statusMessage.textContent = 'Backup failed!';
-        } else if (status.complete) {
-            statusMessage.textContent = 'Backup complete!';
-        } else if (processed > 0) {
-             statusMessage.textContent = 'Backup in progress...';
-        } else {
-             statusMessage.textContent = 'Initializing...';
-        }
-
-
-        currentFileSpan.textContent = status.current_file || '-';
-        processedFilesSpan.textContent = processed;
-        totalFilesSpan.textContent = total;
-        processedSizeSpan.textContent = formatBytes(status.bytes_processed || 0);
-        totalSizeSpan.textContent = formatBytes(status.bytes_total || 0);
-        timeRemainingSpan.textContent = status.est_time_remaining || (processed > 0 ? 'Calculating...' : '-');
-    }
-
-
-    // --- Load Initial Config ---
-    function loadConfig() {
-        fetch('/get-config')
-            .then(r => r.ok ? r.json() : Promise.reject('Failed to load config'))
-            .then(config => {
-                sourceFolderInput.value = config.source || '';
-
-                // Clear existing destinations and add from config
-                destinationsContainer.innerHTML = ''; // Clear first
-                if (config.destinations && config.destinations.length > 0) {
-                    config.destinations.forEach(dest => addDestinationRow(dest));
-                } else {
-                    addDestinationRow(); // Add one empty row if no destinations saved
-                }
-
-                // Set naming options from config
-                if (config.append_location === false) { // Explicitly false
-                    if (config.folder_suffix) {
-                        useSuffixRadio.checked = true;
-                        folderSuffixInput.value = config.folder_suffix;
-                    } else {
-                        dateOnlyRadio.checked = true;
-                    }
-                } else { // Default or explicitly true
-                    appendLocationRadio.checked = true;
-                }
-                handleNamingOptionChange(); // Update suffix input state based on loaded config
-
-            })
-            .catch(err => {
-                console.error('Could not load config:', err);
-                // Add a default destination row even if config fails
-                if (destinationsContainer.children.length === 0) {
-                    addDestinationRow();
-                }
-                handleNamingOptionChange(); // Ensure suffix disabled by default
-            });
-    }
-
-    // Initial load
-    loadConfig();
-
-});'''
-
-    with open(os.path.join(web_dir, 'scripts.js'), 'w', encoding='utf-8') as f:
-        f.write(scripts_js_content)
-
-    print("Web files updated/created in 'web' directory.")
+    missing = [name for name in WEB_FILES if not os.path.isfile(os.path.join(web_dir, name))]
+    if missing:
+        print(f"Error: Web interface files missing from {web_dir}: {', '.join(missing)}", file=sys.stderr)
+        print("Restore them from the repository to use the UI (CLI mode still works).", file=sys.stderr)
+        return False
+    return True
 
 
 # --- CLI Mode Functions ---
@@ -1992,7 +2576,7 @@ def run_cli():
                 if suffix:
                     # Basic sanitization (replace common problematic chars) - more robust needed if complex names allowed
                     # safe_suffix = suffix.replace('/', '-').replace('\\', '-').replace(':', '-')
-                    backup.folder_suffix = suffix # Store user input directly, sanitization happens in process_image
+                    backup.folder_suffix = suffix # Store user input directly, sanitization happens when folder names are built
                     break
                 else:
                     print("Suffix cannot be empty.")
@@ -2041,23 +2625,30 @@ def main():
     if args.ui:
         # --- UI Mode ---
         print("Starting Photo Backup Tool in UI mode...")
-        # Create web files if they don't exist or need update
-        create_web_files()
+        # The UI is served from the files in 'web/'
+        if not check_web_files():
+            sys.exit(1)
 
         # Start server
         server = PhotoBackupServer()
+        # Ctrl+C wakes the blocking wait below instead of the loop polling for it
+        previous_sigint = signal.signal(signal.SIGINT, lambda *_: FileDialogHelper.stop_main_thread_calls())
         try:
             port = server.start_server() # Handles printing messages and opening browser
 
             print("Press Ctrl+C in this terminal to stop the server.")
-            # Keep the main thread alive while the server runs in its thread
-            while True:
-                time.sleep(1)
+            # Keep the main thread alive while the server runs in its thread, sleeping until
+            # a native folder dialog (which has to live on it) is queued or Ctrl+C arrives
+            # (bounded waits on Windows only, see MAIN_THREAD_POLL_SECONDS)
+            while FileDialogHelper.run_main_thread_calls(timeout=MAIN_THREAD_POLL_SECONDS):
+                pass
+            print("\nCtrl+C received.")
         except KeyboardInterrupt:
             print("\nCtrl+C received.")
         except Exception as e:
             print(f"\nAn error occurred during UI server execution: {e}", file=sys.stderr)
         finally:
+            signal.signal(signal.SIGINT, previous_sigint)
             server.stop_server()
             print("Photo Backup Tool UI finished.")
 
@@ -19,19 +19,20 @@ document.addEventListener('DOMContentLoaded', function() {
     const progressFill = document.querySelector('.progress-fill');
     const progressText = document.querySelector('.progress-text');
     const statusMessage = document.getElementById('status-message');
-    const currentFileSpan = document.getElementById('current-file');
-    const processedFilesSpan = document.getElementById('processed-files');
-    const totalFilesSpan = document.getElementById('total-files');
-    const processedSizeSpan = document.getElementById('processed-size');
-    const totalSizeSpan = document.getElementById('total-size');
-    const timeRemainingSpan = document.getElementById('time-remaining');
+    const progressStatsDiv = document.getElementById('progress-stats');
+    const progressStatsTemplate = document.getElementById('progress-stats-template');
     const completionMessageDiv = document.querySelector('.completion-message');
     const errorMessageDiv = document.querySelector('.error-message');
     const errorTextSpan = document.getElementById('error-text');
     const newBackupButton = document.getElementById('new-backup');
     const tryAgainButton = document.getElementById('try-again'); // Renamed from 'try-again' in HTML logic
 
-    let statusInterval = null; // To store the interval ID for polling
+    let statusTimer = null; // To store the timeout ID for the next status poll
+    let pollGeneration = 0; // Bumped to stop a polling loop whose request is still in flight
+    // Adaptive polling: fast while the status is changing, slower once it has been idle a while
+    const POLL_FAST_MS = 500;
+    const POLL_SLOW_MS = 2000;
+    const POLL_IDLE_AFTER_MS = 3000;
 
     // --- Initial Setup ---
 
@@ -91,13 +92,25 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
 
+    // Function to render the progress stats rows in a single DOM mutation.
+    // The template clone is populated while detached, so the four text writes
+    // cost no layout; replaceChildren() then swaps the whole block in at once.
+    function renderProgressStats(fields) {
+        const frag = progressStatsTemplate.content.cloneNode(true);
+        frag.querySelectorAll('[data-field]').forEach(span => {
+            span.textContent = fields[span.dataset.field];
+        });
+        progressStatsDiv.replaceChildren(frag);
+    }
+
      // Function to reset the UI to the initial setup state
     function resetUI() {
         // Stop polling if active
-        if (statusInterval) {
-            clearInterval(statusInterval);
-            statusInterval = null;
+        if (statusTimer) {
+            clearTimeout(statusTimer);
+            statusTimer = null;
         }
+        pollGeneration++;
 
         // Show setup, hide progress
         setupPanel.style.display = 'block';
@@ -109,12 +122,14 @@ document.addEventListener('DOMContentLoaded', function() {
         progressFill.style.width = '0%';
         progressText.textContent = '0%';
         statusMessage.textContent = 'Initializing...';
-        currentFileSpan.textContent = '-';
-        processedFilesSpan.textContent = '0';
-        totalFilesSpan.textContent = '0';
-        processedSizeSpan.textContent = '0 MB';
-        totalSizeSpan.textContent = '0 MB';
-        timeRemainingSpan.textContent = 'Calculating...';
+        renderProgressStats({
+            'current-file': '-',
+            'processed-files': '0',
+            'total-files': '0',
+            'processed-size': '0 MB',
+            'total-size': '0 MB',
+            'time-remaining': 'Calculating...'
+        });
         errorTextSpan.textContent = '';
 
         // Re-enable start button
@@ -304,22 +319,41 @@ document.addEventListener('DOMContentLoaded', function() {
     // --- Status Polling and UI Update ---
 
     function pollStatus() {
-        // Clear previous interval if any (safety check)
-        if (statusInterval) clearInterval(statusInterval);
+        // Clear previous timer if any (safety check)
+        if (statusTimer) clearTimeout(statusTimer);
+        const generation = ++pollGeneration;
+
+        let lastEtag = null;
+        let lastChangeTs = Date.now();
+
+        function scheduleNext() {
+            if (generation !== pollGeneration) return; // UI was reset or a new poll loop started
+            // Back off once nothing has changed for a while; any change switches back to fast polling
+            const idle = Date.now() - lastChangeTs > POLL_IDLE_AFTER_MS;
+            statusTimer = setTimeout(poll, idle ? POLL_SLOW_MS : POLL_FAST_MS);
+        }
 
-        statusInterval = setInterval(() => {
-            fetch('/status')
+        function poll() {
+            statusTimer = null;
+            // The server answers 304 (no body) while the status ETag is unchanged
+            const headers = lastEtag ? { 'If-None-Match': lastEtag } : {};
+            fetch('/status', { headers: headers, cache: 'no-store' })
                 .then(response => {
+                    if (response.status === 304) { return null; } // Unchanged
                     if (!response.ok) { throw new Error(`Status fetch failed: ${response.status}`); }
+                    lastEtag = response.headers.get('ETag');
+                    lastChangeTs = Date.now();
                     return response.json();
                 })
                 .then(status => {
+                    if (status === null) {
+                        scheduleNext();
+                        return;
+                    }
                     updateProgressUI(status);
 
                     // Stop polling if complete or error occurred
                     if (status.complete || status.error) {
-                        clearInterval(statusInterval);
-                        statusInterval = null;
                         startBackupButton.disabled = false; // Re-enable start button once done/failed
 
                         if (status.error) {
@@ -332,18 +366,21 @@ document.addEventListener('DOMContentLoaded', function() {
                              errorMessageDiv.style.display = 'none';
                              completionMessageDiv.style.display = 'block';
                         }
+                        return;
                     }
+                    scheduleNext();
                 })
                 .catch(error => {
                     console.error('Error polling status:', error);
                     statusMessage.textContent = 'Error fetching status.';
-                    // Optionally stop polling on error, or keep trying?
-                    // clearInterval(statusInterval);
-                    // statusInterval = null;
+                    // Keep trying: the server may just be busy
                     // errorTextSpan.textContent = 'Connection lost or server error.';
                     // errorMessageDiv.style.display = 'block';
+                    scheduleNext();
                 });
-        }, 1000); // Poll every 1 second
+        }
+
+        poll();
     }
 
     function updateProgressUI(status) {
@@ -366,12 +403,14 @@ document.addEventListener('DOMContentLoaded', function() {
         }
 
 
-        currentFileSpan.textContent = status.current_file || '-';
-        processedFilesSpan.textContent = processed;
-        totalFilesSpan.textContent = total;
-        processedSizeSpan.textContent = formatBytes(status.bytes_processed || 0);
-        totalSizeSpan.textContent = formatBytes(status.bytes_total || 0);
-        timeRemainingSpan.textContent = status.est_time_remaining || (processed > 0 ? 'Calculating...' : '-');
+        renderProgressStats({
+            'current-file': status.current_file || '-',
+            'processed-files': processed,
+            'total-files': total,
+            'processed-size': formatBytes(status.bytes_processed || 0),
+            'total-size': formatBytes(status.bytes_total || 0),
+            'time-remaining': status.est_time_remaining || (processed > 0 ? 'Calculating...' : '-')
+        });
     }
 
 
@@ -14,8 +14,10 @@ from enum import Enum
 import numpy as np
 import cv2
 from tqdm import tqdm
-import multiprocessing
-from typing import List, Tuple, Dict, Optional, Union, Any
+import tempfile
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple, Dict, Optional, Union, Any, Iterator
 
 
 class AlignmentMethod(Enum):
@@ -38,6 +40,127 @@ class BlendMode(Enum):
     HARD = "hard"
 
 
+# Route alignment warps and the Laplacian through OpenCL (transparent API) when a usable
+# device exists; UMat still works without one, but only adds copies on the CPU path
+OPENCL_AVAILABLE = cv2.ocl.haveOpenCL()
+if OPENCL_AVAILABLE:
+    cv2.ocl.setUseOpenCL(True)
+
+
+def _to_device(img):
+    """Wrap an array as a UMat when OpenCL is available, otherwise return it unchanged."""
+    return cv2.UMat(img) if OPENCL_AVAILABLE else img
+
+
+def _to_host(img):
+    """Download a UMat back to a numpy array; numpy arrays pass through."""
+    return img.get() if isinstance(img, cv2.UMat) else img
+
+
+# CUDA builds of OpenCV take over the alignment warps. ECC has no cv2.cuda port and its
+# Laplacian only supports apertures 1 and 3, so the rest stays on OpenCL or the CPU
+CUDA_AVAILABLE = hasattr(cv2, 'cuda') and cv2.cuda.getCudaEnabledDeviceCount() > 0
+
+
+def _warp(name: str, img: np.ndarray, matrix: np.ndarray, size: Tuple[int, int],
+          flags: int = cv2.INTER_LINEAR) -> np.ndarray:
+    """Run cv2.<name> (warpAffine or warpPerspective) on CUDA, OpenCL or the CPU, returning an array."""
+    if CUDA_AVAILABLE:
+        gpu_img = cv2.cuda_GpuMat()
+        gpu_img.upload(img)
+        return getattr(cv2.cuda, name)(gpu_img, matrix, size, flags=flags).download()
+    return _to_host(getattr(cv2, name)(_to_device(img), matrix, size, flags=flags))
+
+
+# Coarse-to-fine ECC: at most this many pyramid levels (full resolution included), and
+# no level whose shorter side would drop below ECC_PYRAMID_MIN_SIZE pixels
+ECC_PYRAMID_LEVELS = 3
+ECC_PYRAMID_MIN_SIZE = 64
+
+
+def _gray_pyramid(gray: np.ndarray) -> List[np.ndarray]:
+    """Gaussian pyramid of a grayscale image for ECC, ordered coarsest first."""
+    pyramid = [gray]
+    while len(pyramid) < ECC_PYRAMID_LEVELS and min(pyramid[-1].shape[:2]) // 2 >= ECC_PYRAMID_MIN_SIZE:
+        pyramid.append(cv2.pyrDown(pyramid[-1]))
+    return pyramid[::-1]
+
+
+# Largest Laplacian aperture whose response to uint8 input cannot overflow int16: the peak is
+# 255 times the kernel's positive (or negative) coefficient sum from cv2.getDerivKernels,
+# 56 * 255 = 14280 for ksize=5 but 600 * 255 = 153000 for ksize=7
+LAPLACIAN_INT16_MAX_KSIZE = 5
+
+
+def _sharpness_map(img: np.ndarray, metric: SharpnessMetric, kernel_size: int,
+                   gray: Optional[np.ndarray] = None) -> np.ndarray:
+    """Compute the local sharpness map of a BGR image, reusing its grayscale version if given."""
+    if gray is None:
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    
+    if metric == SharpnessMetric.LAPLACIAN:
+        # Laplacian variance (most common focus measure)
+        if kernel_size <= LAPLACIAN_INT16_MAX_KSIZE:
+            # Integer kernels on uint8 input: the exact response fits int16, halving the bytes
+            # moved versus float32. The box mean below stays in int16 too; np.argmax and the
+            # feathered weights only depend on relative values, so the integer scale is harmless
+            lap = cv2.Laplacian(_to_device(gray), cv2.CV_16S, ksize=kernel_size)
+            # No saturation to worry about: |lap| <= 14280 < 32767 for these kernel sizes.
+            # absdiff against 0 is np.abs that also runs on the device
+            laplacian_abs = cv2.absdiff(lap, 0)
+            return _to_host(cv2.blur(laplacian_abs, (kernel_size, kernel_size)))
+        lap = cv2.Laplacian(gray, cv2.CV_32F, ksize=kernel_size)
+        # Calculate variance in local windows (abs in place: no second full-frame float buffer)
+        laplacian_abs = np.abs(lap, out=lap)
+        return cv2.blur(laplacian_abs, (kernel_size, kernel_size))
+        
+    elif metric == SharpnessMetric.SOBEL:
+        # Sobel gradient magnitude (float32 is ample precision for uint8 input)
+        sobelx = cv2.Sobel(gray, cv2.CV_32F, 1, 0, ksize=kernel_size)
+        sobely = cv2.Sobel(gray, cv2.CV_32F, 0, 1, ksize=kernel_size)
+        magnitude = cv2.magnitude(sobelx, sobely)
+        # Apply smoothing to compute local average (box filter: cost independent of kernel size)
+        return cv2.blur(magnitude, (kernel_size, kernel_size))
+        
+    elif metric == SharpnessMetric.TENENGRAD:
+        # Tenengrad (gradient magnitude squared)
+        sobelx = cv2.Sobel(gray, cv2.CV_32F, 1, 0, ksize=kernel_size)
+        sobely = cv2.Sobel(gray, cv2.CV_32F, 0, 1, ksize=kernel_size)
+        tenengrad = sobelx**2 + sobely**2
+        # Apply smoothing to compute local average
+        return cv2.blur(tenengrad, (kernel_size, kernel_size))
+
+
+def _remove_file(path: str) -> None:
+    """Best-effort removal of a temporary stack file."""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+# Rows blended at a time by generate_focus_stack
+BLEND_BAND_ROWS = 512
+
+
+def _stack_sharpness(maps: List[np.ndarray], exact: bool = False) -> np.ndarray:
+    """Stack sharpness maps for blending, at 2 bytes per value unless `exact`.
+    
+    int16 Laplacian maps are stacked as they are. Float maps are kept float32 when `exact`
+    (needed for the hard blend's argmax, so it matches the tiled path). Otherwise they are scaled
+    by the stack-wide peak into [0, 1] and stored as float16 (Tenengrad easily exceeds float16's
+    range unscaled). That is lossy: close values collapse into ties and small ones underflow,
+    which only the feathered weights can tolerate.
+    """
+    if maps[0].dtype == np.int16 or exact:
+        return np.array(maps)
+    stacked = np.empty((len(maps),) + maps[0].shape, dtype=np.float16)
+    scale = 1.0 / (max(float(m.max()) for m in maps) or 1.0)
+    for i, sharpness_map in enumerate(maps):
+        np.multiply(sharpness_map, scale, out=stacked[i], casting='unsafe')
+    return stacked
+
+
 class FocusStacker:
     """
     Main class for focus stacking operations.
@@ -52,6 +175,7 @@ class FocusStacker:
                  kernel_size: int = 5,
                  blend_mode: BlendMode = BlendMode.FEATHERED,
                  output_format: str = "png",
+                 png_compression: int = 6,
                  downscale_factor: float = 1.0,
                  use_multiprocessing: bool = False,
                  verbose: bool = False):
@@ -64,6 +188,7 @@ class FocusStacker:
             kernel_size: Size of kernel for local sharpness evaluation
             blend_mode: Method for blending selected regions
             output_format: Format for saving the output image
+            png_compression: zlib level (0-9) for PNG output; 9 is smallest but several times slower
             downscale_factor: Factor to downscale images during processing (1.0 = no downscaling)
             use_multiprocessing: Whether to use multiprocessing for faster processing
             verbose: Whether to output detailed processing information and intermediate results
@@ -73,6 +198,7 @@ class FocusStacker:
         self.kernel_size = kernel_size
         self.blend_mode = blend_mode
         self.output_format = output_format.lower()
+        self.png_compression = png_compression
         self.downscale_factor = downscale_factor
         self.use_multiprocessing = use_multiprocessing
         self.verbose = verbose
@@ -85,10 +211,17 @@ class FocusStacker:
         if self.output_format not in ['jpg', 'jpeg', 'png', 'tiff', 'tif']:
             raise ValueError(f"Unsupported output format: {self.output_format}")
             
+        if not 0 <= self.png_compression <= 9:
+            raise ValueError(f"PNG compression must be between 0 and 9: {self.png_compression}")
+            
         self.images = []
         self.aligned_images = []
         self.sharpness_maps = []
         self.output_image = None
+        # Finalizer that deletes the backing file of the memmapped aligned stack
+        self._aligned_cleanup = None
+        # Grayscale of aligned_images[0], kept from alignment for its sharpness map
+        self._gray_reference = None
         
     def load_images(self, image_paths: List[str]) -> None:
         """
@@ -106,28 +239,18 @@ class FocusStacker:
             
         self.images = []
         
-        for path in tqdm(image_paths, disable=not self.verbose):
-            if not os.path.exists(path):
-                raise FileNotFoundError(f"Image file not found: {path}")
-                
-            try:
-                img = cv2.imread(path)
-                if img is None:
-                    print(f"Warning: Could not read image {path}, skipping.")
-                    continue
-                    
-                # Apply downscaling if requested
-                if self.downscale_factor != 1.0:
-                    width = int(img.shape[1] * self.downscale_factor)
-                    height = int(img.shape[0] * self.downscale_factor)
-                    img = cv2.resize(img, (width, height), interpolation=cv2.INTER_AREA)
-                    
-                self.images.append(img)
-                
-                if self.verbose:
-                    print(f"Loaded {path}, shape: {img.shape}")
-            except Exception as e:
-                print(f"Error loading {path}: {str(e)}")
+        if self.use_multiprocessing and len(image_paths) > 1:
+            # cv2.imread releases the GIL while decoding, so threads decode in parallel
+            # without pickling full-resolution arrays back from worker processes
+            with ThreadPoolExecutor(max_workers=min(os.cpu_count() or 1, len(image_paths))) as executor:
+                loaded = list(tqdm(executor.map(self._read_image, image_paths),
+                                   total=len(image_paths), disable=not self.verbose))
+            self.images = [img for img in loaded if img is not None]
+        else:
+            for path in tqdm(image_paths, disable=not self.verbose):
+                img = self._read_image(path)
+                if img is not None:
+                    self.images.append(img)
                 
         if not self.images:
             raise ValueError("No valid images could be loaded")
@@ -135,6 +258,44 @@ class FocusStacker:
         if self.verbose:
             print(f"Loaded {len(self.images)} images")
     
+    def _read_image(self, path: str) -> Optional[np.ndarray]:
+        """Read and optionally downscale a single image, or return None if unreadable."""
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Image file not found: {path}")
+            
+        try:
+            img = cv2.imread(path)
+            if img is None:
+                print(f"Warning: Could not read image {path}, skipping.")
+                return None
+                
+            # Apply downscaling if requested
+            if self.downscale_factor != 1.0:
+                width = int(img.shape[1] * self.downscale_factor)
+                height = int(img.shape[0] * self.downscale_factor)
+                img = cv2.resize(img, (width, height), interpolation=cv2.INTER_AREA)
+                
+            if self.verbose:
+                print(f"Loaded {path}, shape: {img.shape}")
+            return img
+        except Exception as e:
+            print(f"Error loading {path}: {str(e)}")
+            return None
+    
+    def _prefetch_images(self, image_paths: List[str]) -> Iterator[Optional[np.ndarray]]:
+        """Yield each image (None if unreadable) in order, decoding the next one in the background."""
+        if not image_paths:
+            return
+        # One read ahead overlaps disk I/O and decoding (cv2.imread releases the GIL) with
+        # whatever the caller does to the current image, at the cost of one extra frame in RAM
+        with ThreadPoolExecutor(max_workers=1) as reader:
+            pending = reader.submit(self._read_image, image_paths[0])
+            for path in image_paths[1:]:
+                img = pending.result()
+                pending = reader.submit(self._read_image, path)
+                yield img
+            yield pending.result()
+    
     def align_images(self) -> None:
         """
         Align all loaded images to the first image in the stack.
@@ -147,84 +308,139 @@ class FocusStacker:
             
         if len(self.images) < 2:
             self.aligned_images = self.images.copy()
+            self._gray_reference = None
             return
             
         # Use the first image as reference
         reference = self.images[0]
         gray_reference = cv2.cvtColor(reference, cv2.COLOR_BGR2GRAY)
-        self.aligned_images = [reference]
+        self._gray_reference = gray_reference
+        reference_features = self._reference_features(gray_reference)
+        # One (N, H, W, C) memmap instead of N separate arrays: blending reads it as a single
+        # stack, and the OS can page cold frames out
+        self.aligned_images = self._create_aligned_stack((len(self.images),) + reference.shape)
+        self.aligned_images[0] = reference
         
-        for i, img in enumerate(tqdm(self.images[1:], disable=not self.verbose), 1):
-            if self.alignment_method == AlignmentMethod.NONE:
-                self.aligned_images.append(img)
-                continue
-                
-            gray_img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        def align_frame(i: int) -> None:
+            self.aligned_images[i] = self._align_to_reference(self.images[i], reference, gray_reference,
+                                                              reference_features, i)
+        
+        frames = range(1, len(self.images))
+        if self.use_multiprocessing and len(frames) > 1:
+            # Frames align independently and ECC/ORB/warps release the GIL, so threads run them
+            # in parallel and write straight into their own slice of the shared stack
+            with ThreadPoolExecutor(max_workers=min(os.cpu_count() or 1, len(frames))) as executor:
+                list(tqdm(executor.map(align_frame, frames), total=len(frames), disable=not self.verbose))
+        else:
+            for i in tqdm(frames, disable=not self.verbose):
+                align_frame(i)
+        
+        # The originals are no longer needed once the aligned stack holds every frame
+        self.images = []
+        
+        if self.verbose:
+            print(f"Aligned {len(self.aligned_images)} images")
+    
+    def _create_aligned_stack(self, shape: Tuple[int, ...]) -> np.memmap:
+        """Create the disk-backed uint8 stack for aligned images, deleted along with the stacker."""
+        if self._aligned_cleanup is not None:
+            # Existing views stay valid after the unlink; the space is reclaimed once they go
+            self._aligned_cleanup()
+        fd, path = tempfile.mkstemp(prefix='focus_stack_', suffix='.raw')
+        os.close(fd)
+        self._aligned_cleanup = weakref.finalize(self, _remove_file, path)
+        return np.memmap(path, dtype=np.uint8, mode='w+', shape=shape)
+    
+    def _reference_features(self, gray_reference: np.ndarray) -> Optional[Tuple[Any, Optional[np.ndarray]]]:
+        """ORB keypoints and descriptors of the reference, computed once per stack (None unless ORB)."""
+        if self.alignment_method != AlignmentMethod.ORB:
+            return None
+        kp, des = cv2.ORB_create().detectAndCompute(_to_device(gray_reference), None)
+        # Descriptors come back as UMat on the OpenCL path; matching and the checks below need arrays
+        return kp, (None if des is None else _to_host(des))
+    
+    def _align_to_reference(self, img: np.ndarray, reference: np.ndarray, gray_reference: np.ndarray,
+                            reference_features: Optional[Tuple[Any, Optional[np.ndarray]]],
+                            i: int) -> np.ndarray:
+        """Align a single image to the reference, falling back to the original on failure."""
+        if self.alignment_method == AlignmentMethod.NONE:
+            return img
             
-            if self.alignment_method == AlignmentMethod.ECC:
-                # Enhanced Correlation Coefficient alignment
-                warp_mode = cv2.MOTION_TRANSLATION
-                warp_matrix = np.eye(2, 3, dtype=np.float32)
-                criteria = (cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 1000, 1e-5)
-                
-                try:
-                    _, warp_matrix = cv2.findTransformECC(
-                        gray_reference, gray_img, warp_matrix, warp_mode, criteria)
-                    aligned = cv2.warpAffine(img, warp_matrix, (reference.shape[1], reference.shape[0]),
-                                          flags=cv2.INTER_LINEAR + cv2.WARP_INVERSE_MAP)
-                    self.aligned_images.append(aligned)
-                except Exception as e:
-                    print(f"Warning: ECC alignment failed for image {i}. Using original image. Error: {str(e)}")
-                    self.aligned_images.append(img)
-                    
-            elif self.alignment_method == AlignmentMethod.ORB:
-                # ORB feature matching
-                orb = cv2.ORB_create()
-                kp1, des1 = orb.detectAndCompute(gray_reference, None)
-                kp2, des2 = orb.detectAndCompute(gray_img, None)
+        gray_img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        
+        if self.alignment_method == AlignmentMethod.ECC:
+            # Enhanced Correlation Coefficient alignment
+            warp_mode = cv2.MOTION_TRANSLATION
+            warp_matrix = np.eye(2, 3, dtype=np.float32)
+            # Converge cheaply on downsampled frames, then only refine at full resolution.
+            # Without a coarse estimate (small frames, or every coarse level failed) the
+            # full-resolution search starts from scratch with the original budget
+            coarse_criteria = (cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 100, 1e-4)
+            refine_criteria = (cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 200, 1e-5)
+            full_criteria = (cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 1000, 1e-5)
+            
+            try:
+                levels = list(zip(_gray_pyramid(gray_reference), _gray_pyramid(gray_img)))
+                estimated = False
+                for ref_level, img_level in levels[:-1]:
+                    try:
+                        # findTransformECC updates its warp argument in place even when it fails
+                        _, warp_matrix = cv2.findTransformECC(
+                            ref_level, img_level, warp_matrix.copy(), warp_mode, coarse_criteria, None, 5)
+                        estimated = True
+                    except cv2.error:
+                        # Coarse levels can lose too much detail to converge; keep the last estimate
+                        pass
+                    # Translation is in pixels, so it doubles with each finer level
+                    warp_matrix[:, 2] *= 2
+                _, warp_matrix = cv2.findTransformECC(
+                    gray_reference, gray_img, warp_matrix, warp_mode,
+                    refine_criteria if estimated else full_criteria, None, 5)
+                return _warp('warpAffine', img, warp_matrix, (reference.shape[1], reference.shape[0]),
+                             flags=cv2.INTER_LINEAR + cv2.WARP_INVERSE_MAP)
+            except Exception as e:
+                print(f"Warning: ECC alignment failed for image {i}. Using original image. Error: {str(e)}")
+                return img
                 
-                if des1 is None or des2 is None or len(des1) < 2 or len(des2) < 2:
-                    print(f"Warning: Not enough features found in image {i}. Using original image.")
-                    self.aligned_images.append(img)
-                    continue
+        elif self.alignment_method == AlignmentMethod.ORB:
+            # ORB feature matching
+            # The reference side comes precomputed from _reference_features()
+            kp1, des1 = reference_features
+            kp2, des2 = cv2.ORB_create().detectAndCompute(_to_device(gray_img), None)
+            des2 = None if des2 is None else _to_host(des2)
+            
+            if des1 is None or des2 is None or len(des1) < 2 or len(des2) < 2:
+                print(f"Warning: Not enough features found in image {i}. Using original image.")
+                return img
+            
+            try:
+                # ORB descriptors are binary: exact brute-force Hamming matching (popcount) beats
+                # an approximate LSH index at ORB's feature counts
+                matcher = cv2.BFMatcher(cv2.NORM_HAMMING)
+                matches = matcher.knnMatch(des1, des2, k=2)
                 
-                # FLANN parameters
-                FLANN_INDEX_LSH = 6
-                index_params = dict(algorithm=FLANN_INDEX_LSH,
-                                    table_number=6,
-                                    key_size=12,
-                                    multi_probe_level=1)
-                search_params = dict(checks=50)
+                # Keep good matches using Lowe's ratio test
+                good_matches = []
+                for match in matches:
+                    if len(match) == 2:
+                        m, n = match
+                        if m.distance < 0.7 * n.distance:
+                            good_matches.append(m)
                 
-                try:
-                    flann = cv2.FlannBasedMatcher(index_params, search_params)
-                    matches = flann.knnMatch(des1, des2, k=2)
+                if len(good_matches) >= 4:
+                    src_pts = np.float32([kp1[m.queryIdx].pt for m in good_matches]).reshape(-1, 1, 2)
+                    dst_pts = np.float32([kp2[m.trainIdx].pt for m in good_matches]).reshape(-1, 1, 2)
                     
-                    # Keep good matches using Lowe's ratio test
-                    good_matches = []
-                    for match in matches:
-                        if len(match) == 2:
-                            m, n = match
-                            if m.distance < 0.7 * n.distance:
-                                good_matches.append(m)
-                    
-                    if len(good_matches) >= 4:
-                        src_pts = np.float32([kp1[m.queryIdx].pt for m in good_matches]).reshape(-1, 1, 2)
-                        dst_pts = np.float32([kp2[m.trainIdx].pt for m in good_matches]).reshape(-1, 1, 2)
-                        
-                        # Find homography
-                        M, mask = cv2.findHomography(dst_pts, src_pts, cv2.RANSAC, 5.0)
-                        aligned = cv2.warpPerspective(img, M, (reference.shape[1], reference.shape[0]))
-                        self.aligned_images.append(aligned)
-                    else:
-                        print(f"Warning: Not enough good matches for image {i}. Using original image.")
-                        self.aligned_images.append(img)
-                except Exception as e:
-                    print(f"Warning: ORB alignment failed for image {i}. Using original image. Error: {str(e)}")
-                    self.aligned_images.append(img)
-        
-        if self.verbose:
-            print(f"Aligned {len(self.aligned_images)} images")
+                    # Find homography
+                    M, mask = cv2.findHomography(dst_pts, src_pts, cv2.RANSAC, 5.0)
+                    return _warp('warpPerspective', img, M, (reference.shape[1], reference.shape[0]))
+                else:
+                    print(f"Warning: Not enough good matches for image {i}. Using original image.")
+                    return img
+            except Exception as e:
+                print(f"Warning: ORB alignment failed for image {i}. Using original image. Error: {str(e)}")
+                return img
+        return img
     
     def compute_sharpness_maps(self) -> None:
         """
@@ -238,46 +454,25 @@ class FocusStacker:
             
         self.sharpness_maps = []
         
-        def process_image(img):
-            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-            
-            if self.sharpness_metric == SharpnessMetric.LAPLACIAN:
-                # Laplacian variance (most common focus measure)
-                lap = cv2.Laplacian(gray, cv2.CV_64F, ksize=self.kernel_size)
-                # Calculate variance in local windows
-                kernel = np.ones((self.kernel_size, self.kernel_size), np.float32) / (self.kernel_size * self.kernel_size)
-                laplacian_abs = np.abs(lap)
-                return cv2.filter2D(laplacian_abs, -1, kernel)
-                
-            elif self.sharpness_metric == SharpnessMetric.SOBEL:
-                # Sobel gradient magnitude
-                sobelx = cv2.Sobel(gray, cv2.CV_64F, 1, 0, ksize=self.kernel_size)
-                sobely = cv2.Sobel(gray, cv2.CV_64F, 0, 1, ksize=self.kernel_size)
-                magnitude = np.sqrt(sobelx**2 + sobely**2)
-                # Apply smoothing to compute local average
-                kernel = np.ones((self.kernel_size, self.kernel_size), np.float32) / (self.kernel_size * self.kernel_size)
-                return cv2.filter2D(magnitude, -1, kernel)
-                
-            elif self.sharpness_metric == SharpnessMetric.TENENGRAD:
-                # Tenengrad (gradient magnitude squared)
-                sobelx = cv2.Sobel(gray, cv2.CV_64F, 1, 0, ksize=self.kernel_size)
-                sobely = cv2.Sobel(gray, cv2.CV_64F, 0, 1, ksize=self.kernel_size)
-                tenengrad = sobelx**2 + sobely**2
-                # Apply smoothing to compute local average
-                kernel = np.ones((self.kernel_size, self.kernel_size), np.float32) / (self.kernel_size * self.kernel_size)
-                return cv2.filter2D(tenengrad, -1, kernel)
+        def process_image(img: np.ndarray, gray: Optional[np.ndarray]) -> np.ndarray:
+            return _sharpness_map(img, self.sharpness_metric, self.kernel_size, gray)
+        
+        # The reference is unchanged by alignment, so its grayscale from align_images() still applies
+        grays = [self._gray_reference] + [None] * (len(self.aligned_images) - 1)
         
         if self.use_multiprocessing and len(self.aligned_images) > 1:
-            # Use multiprocessing for faster computation
-            with multiprocessing.Pool(processes=min(multiprocessing.cpu_count(), len(self.aligned_images))) as pool:
+            # The OpenCV filters release the GIL, so threads scale across cores and read the
+            # aligned stack in place instead of pickling frames to worker processes
+            with ThreadPoolExecutor(max_workers=min(os.cpu_count() or 1, len(self.aligned_images))) as executor:
                 self.sharpness_maps = list(tqdm(
-                    pool.imap(process_image, self.aligned_images),
+                    executor.map(process_image, self.aligned_images, grays),
                     total=len(self.aligned_images),
                     disable=not self.verbose
                 ))
         else:
-            for img in tqdm(self.aligned_images, disable=not self.verbose):
-                self.sharpness_maps.append(process_image(img))
+            for img, gray in tqdm(zip(self.aligned_images, grays), total=len(self.aligned_images),
+                                  disable=not self.verbose):
+                self.sharpness_maps.append(process_image(img, gray))
                 
         if self.verbose:
             print(f"Computed {len(self.sharpness_maps)} sharpness maps")
@@ -299,50 +494,52 @@ class FocusStacker:
         if self.verbose:
             print("Generating focus stack...")
             
-        if not self.sharpness_maps or not self.aligned_images:
+        if not self.sharpness_maps or len(self.aligned_images) == 0:
             raise ValueError("Sharpness maps or aligned images are missing. Run align_images() and compute_sharpness_maps() first.")
             
-        # Find the regions with maximum sharpness
-        sharpness_maps = np.array(self.sharpness_maps)
-        shape = self.aligned_images[0].shape
-        
-        # Get index of maximum sharpness for each pixel
-        max_sharp_indices = np.argmax(sharpness_maps, axis=0)
+        # Find the regions with maximum sharpness. Blending is per pixel, so it runs over
+        # row bands: the argmax, weights and gathered pixels of one band stay cache-sized
+        # instead of being full-frame temporaries
+        sharpness_maps = _stack_sharpness(self.sharpness_maps, exact=self.blend_mode == BlendMode.HARD)
+        images = np.asarray(self.aligned_images)
+        self.output_image = np.empty(images.shape[1:], dtype=np.uint8)
+        for y in range(0, images.shape[1], BLEND_BAND_ROWS):
+            band = slice(y, y + BLEND_BAND_ROWS)
+            self.output_image[band] = self._blend(sharpness_maps[:, band], images[:, band])
         
+        if self.verbose:
+            print("Focus stack generated")
+            
+    def _blend(self, sharpness_maps: np.ndarray, images: Any) -> np.ndarray:
+        """Blend the images (or tiles of them) according to their stacked sharpness maps."""
         if self.blend_mode == BlendMode.HARD:
-            # Hard blending - pick pixels directly from images with max sharpness
-            result = np.zeros(shape, dtype=np.uint8)
-            for i, img in enumerate(self.aligned_images):
-                mask = (max_sharp_indices == i)
-                mask_3d = np.stack([mask] * 3, axis=2)
-                result = np.where(mask_3d, img, result)
+            # Get index of maximum sharpness for each pixel
+            max_sharp_indices = np.argmax(sharpness_maps, axis=0)
+            
+            # Hard blending - pick pixels directly from images with max sharpness,
+            # as a single gather from the (N, H, W, C) stack instead of one pass per image
+            index = max_sharp_indices[np.newaxis, ..., np.newaxis]
+            result = np.take_along_axis(np.asarray(images), index, axis=0)[0]
                 
         elif self.blend_mode == BlendMode.FEATHERED:
             # Feathered blending - use weighted average based on sharpness values
             
             # Normalize sharpness maps
-            sharpness_sum = np.sum(sharpness_maps, axis=0)
+            # Accumulate in float32: summing float16 maps in their own precision would drift
+            sharpness_sum = np.sum(sharpness_maps, axis=0, dtype=np.float32)
             sharpness_sum = np.where(sharpness_sum == 0, 1, sharpness_sum)  # Avoid division by zero
             
-            # Create the weighted average
-            result = np.zeros(shape, dtype=np.float32)
-            
-            for i, img in enumerate(self.aligned_images):
-                # Calculate weight for this image
-                weight = sharpness_maps[i] / sharpness_sum
-                weight_3d = np.stack([weight] * 3, axis=2)
-                
-                # Add weighted contribution
-                result += img.astype(np.float32) * weight_3d
+            # Per-image weights, then the weighted average as one fused reduction over the
+            # (N, H, W, C) stack. einsum casts the uint8 pixels through its own buffers, so no
+            # float32 copy of the stack or per-image accumulation pass is needed
+            weights = np.divide(sharpness_maps, sharpness_sum, dtype=np.float32)
+            result = np.einsum('nhw,nhwc->hwc', weights, np.asarray(images))
                 
             # Convert back to uint8
             result = np.clip(result, 0, 255).astype(np.uint8)
             
-        self.output_image = result
-        
-        if self.verbose:
-            print("Focus stack generated")
-            
+        return result
+    
     def save_output(self, output_path: str) -> None:
         """
         Save the focus-stacked result to the specified path.
@@ -369,7 +566,7 @@ class FocusStacker:
         elif self.output_format in ['png']:
             if not output_path.lower().endswith('.png'):
                 output_path += '.png'
-            compression_param = [int(cv2.IMWRITE_PNG_COMPRESSION), 9]
+            compression_param = [int(cv2.IMWRITE_PNG_COMPRESSION), self.png_compression]
             cv2.imwrite(output_path, self.output_image, compression_param)
             
         elif self.output_format in ['tif', 'tiff']:
@@ -380,6 +577,70 @@ class FocusStacker:
         if self.verbose:
             print(f"Saved output to {output_path}")
     
+    def _tiled_process(self, image_paths: List[str], tile: int = 512) -> None:
+        """
+        Fused load/align/sharpness/blend pass that never holds the full stack in RAM.
+        
+        Each image is aligned as soon as it is read and written to a disk-backed memmap,
+        then sharpness and blending run tile by tile, so only N tiles of sharpness data
+        are resident instead of N full-frame float64 maps.
+        
+        Args:
+            image_paths: List of paths to source images
+            tile: Edge length of the square tiles processed at once
+        """
+        reference = None
+        count = 0
+        # Unlinked temp file: the OS reclaims it even if processing is interrupted
+        with tempfile.TemporaryFile() as backing:
+            for img in self._prefetch_images(image_paths):
+                if img is None:
+                    continue
+                if reference is None:
+                    reference = img
+                    gray_reference = cv2.cvtColor(reference, cv2.COLOR_BGR2GRAY)
+                    reference_features = self._reference_features(gray_reference)
+                    # Sized for every path up front; unreadable images just leave unused trailing slots
+                    stack = np.memmap(backing, dtype=np.uint8, mode='w+', shape=(len(image_paths),) + reference.shape)
+                    aligned = reference
+                else:
+                    aligned = self._align_to_reference(img, reference, gray_reference, reference_features, count)
+                stack[count] = aligned
+                count += 1
+                
+            if reference is None:
+                raise ValueError("No valid images could be loaded")
+            
+            stack = stack[:count]
+            height, width = reference.shape[:2]
+            del reference, img, aligned
+            
+            # The derivative and box filters each reach kernel_size // 2 pixels (at least 1 for ksize=1),
+            # so a halo of kernel_size keeps every tile identical to the full-frame computation
+            halo = self.kernel_size
+            output = np.empty(stack.shape[1:], dtype=np.uint8)
+            for y in range(0, height, tile):
+                for x in range(0, width, tile):
+                    y0, y1 = max(y - halo, 0), min(y + tile + halo, height)
+                    x0, x1 = max(x - halo, 0), min(x + tile + halo, width)
+                    ty, tx = y - y0, x - x0
+                    th, tw = min(tile, height - y), min(tile, width - x)
+                    
+                    tiles = [stack[i, y0:y1, x0:x1] for i in range(count)]
+                    # Tile borders that are also image borders get the same reflection as before;
+                    # interior ones are covered by the halo and cropped away
+                    # (the reference tile reuses the grayscale computed for alignment)
+                    sharpness = np.array([
+                        _sharpness_map(t, self.sharpness_metric, self.kernel_size,
+                                       gray_reference[y0:y1, x0:x1] if i == 0 else None)[ty:ty + th, tx:tx + tw]
+                        for i, t in enumerate(tiles)
+                    ])
+                    # A view of the stack, not a list of tiles that _blend would copy into a new array
+                    output[y:y + th, x:x + tw] = self._blend(sharpness, stack[:, y:y + th, x:x + tw])
+            
+            del stack
+        self.output_image = output
+    
     def process(self, image_paths: List[str], output_path: str) -> None:
         """
         Process a complete focus stack from input paths to output image.
@@ -390,10 +651,14 @@ class FocusStacker:
             image_paths: List of paths to source images
             output_path: Path to save the focus-stacked result
         """
-        self.load_images(image_paths)
-        self.align_images()
-        self.compute_sharpness_maps()
-        self.generate_focus_stack()
+        if self.verbose:
+            # Verbose runs keep the step-by-step pipeline so the full-frame debug heatmaps are written
+            self.load_images(image_paths)
+            self.align_images()
+            self.compute_sharpness_maps()
+            self.generate_focus_stack()
+        else:
+            self._tiled_process(image_paths)
         self.save_output(output_path)
         
         if self.verbose:
@@ -422,6 +687,9 @@ def parse_arguments():
     parser.add_argument('-f', '--format', choices=['jpg', 'jpeg', 'png', 'tif', 'tiff'], 
                         default='png', help='Output format (default: png)')
                         
+    parser.add_argument('-c', '--png-compression', type=int, choices=range(10), default=6,
+                        help='PNG compression level, 0-9 (default: 6)')
+                        
     parser.add_argument('-d', '--downscale', type=float, default=1.0,
                         help='Downscale factor for processing (default: 1.0, no downscaling)')
                         
@@ -463,6 +731,7 @@ def main():
         kernel_size=args.kernel_size,
         blend_mode=BlendMode(args.blend),
         output_format=args.format,
+        png_compression=args.png_compression,
         downscale_factor=args.downscale,
         use_multiprocessing=args.multiprocessing,
         verbose=args.verbose
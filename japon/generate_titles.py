@@ -1,5 +1,8 @@
 from PIL import Image, ImageDraw, ImageFont, ImageFilter
+import functools
+import math
 import os
+from concurrent.futures import ProcessPoolExecutor
 
 # Create output directory if it doesn't exist
 output_dir = "tokyo_ward_titles"
@@ -43,29 +46,47 @@ tokyo_wards = [
 ]
 
 
-# Function to draw text with a drop shadow
-def draw_text_with_shadow(draw, position, text, font, text_color, shadow_color, shadow_offset, shadow_blur, image):
-    # Create a temporary image for the shadow
+# Load fonts once and reuse them for every ward - you'll need to provide the actual font file paths
+@functools.lru_cache(maxsize=None)
+def load_fonts():
+    try:
+        kanji_font = ImageFont.truetype("AB_appare-Regular.ttf", 150)  # Adjust size as needed
+        romaji_font = ImageFont.truetype("NotoSerifJP-VariableFont_wght.ttf", 80)
+        romaji_font.set_variation_by_name('Bold')
+        tilde_font = ImageFont.truetype("AB_appare-Regular.ttf", 80)  # For the tilde
+    except IOError:
+        print("Font files not found. Please update the font paths in the script.")
+        return None
+    return kanji_font, romaji_font, tilde_font
+
+
+# Function to draw texts with a drop shadow
+# texts is a list of (position, text, font, text_color); all the shadows share one layer,
+# so it is blurred and composited once no matter how many texts there are
+def draw_text_with_shadow(texts, shadow_color, shadow_offset, shadow_blur, image):
+    # Create a temporary image for the shadows
     shadow_img = Image.new("RGBA", image.size, (0, 0, 0, 0))
     shadow_draw = ImageDraw.Draw(shadow_img)
 
-    # Draw the text on the shadow image
-    shadow_draw.text(
-        (position[0] + shadow_offset[0], position[1] + shadow_offset[1]),
-        text,
-        font=font,
-        fill=shadow_color
-    )
+    # Draw every text on the shadow image
+    for position, text, font, text_color in texts:
+        shadow_draw.text(
+            (position[0] + shadow_offset[0], position[1] + shadow_offset[1]),
+            text,
+            font=font,
+            fill=shadow_color
+        )
 
-    # Apply blur to the shadow
+    # Apply blur to the shadows
     shadow_img = shadow_img.filter(ImageFilter.GaussianBlur(radius=shadow_blur))
 
-    # Composite the shadow onto the main image
+    # Composite the shadows onto the main image
     image = Image.alpha_composite(image, shadow_img)
 
-    # Draw the actual text on the main image
+    # Draw the actual texts on the main image
     draw = ImageDraw.Draw(image)
-    draw.text(position, text, fill=text_color, font=font)
+    for position, text, font, text_color in texts:
+        draw.text(position, text, fill=text_color, font=font)
 
     return image
 
@@ -76,50 +97,30 @@ def generate_ward_title(ward_info):
     image = Image.new("RGBA", (width, height), background_color)
     draw = ImageDraw.Draw(image)
 
-    # Load fonts - you'll need to provide the actual font file paths
-    try:
-        kanji_font = ImageFont.truetype("AB_appare-Regular.ttf", 150)  # Adjust size as needed
-        romaji_font = ImageFont.truetype("NotoSerifJP-VariableFont_wght.ttf", 80)
-        romaji_font.set_variation_by_name('Bold')
-        tilde_font = ImageFont.truetype("AB_appare-Regular.ttf", 80)  # For the tilde
-    except IOError:
-        print("Font files not found. Please update the font paths in the script.")
+    fonts = load_fonts()
+    if fonts is None:
         return
+    kanji_font, romaji_font, tilde_font = fonts
 
     # Calculate positions for vertical text
     kanji_text = "\n".join(ward_info["kanji"])
 
-    # Get text dimensions for centering
+    # Get text dimensions for centering (the stacked kanji is multiline, which only the
+    # draw context can measure; single lines are measured on the font directly)
     kanji_bbox = draw.textbbox((0, 0), kanji_text, font=kanji_font, align='center')
     kanji_width = kanji_bbox[2] - kanji_bbox[0]
     kanji_height = kanji_bbox[3] - kanji_bbox[1]
 
-    romaji_bbox = draw.textbbox((0, 0), ward_info["romaji"], font=romaji_font)
+    romaji_bbox = romaji_font.getbbox(ward_info["romaji"])
     romaji_width = romaji_bbox[2] - romaji_bbox[0]
 
-    tilde_bbox = draw.textbbox((0, 0), "~", font=tilde_font)
+    tilde_bbox = tilde_font.getbbox("~")
     tilde_width = tilde_bbox[2] - tilde_bbox[0]
 
     # Center the kanji text horizontally and position it in the upper portion
     kanji_x = (width - kanji_width) // 2
     kanji_y = height // 3 - kanji_height // 2
 
-    # Draw the kanji text with shadow
-    image = draw_text_with_shadow(
-        draw,
-        (kanji_x, kanji_y),
-        kanji_text,
-        kanji_font,
-        kanji_color,
-        shadow_color,
-        shadow_offset,
-        shadow_blur,
-        image
-    )
-
-    # Update draw object after modifying image
-    draw = ImageDraw.Draw(image)
-
     # Calculate positions for tilde and romaji
     tilde_x = (width - tilde_width) // 2
     tilde_y = kanji_y + kanji_height + 40  # Adjust spacing as needed
@@ -128,18 +129,28 @@ def generate_ward_title(ward_info):
     romaji_x = (width - romaji_width) // 2
     romaji_y = tilde_y + tilde_bbox[3] - tilde_bbox[1] + 40  # Adjust spacing as needed
 
-    # Draw the romaji text with shadow
-    image = draw_text_with_shadow(
-        draw,
-        (romaji_x, romaji_y),
-        ward_info["romaji"],
-        romaji_font,
-        romaji_color,
+    # Render only the box the texts and their blurred shadows cover, then paste it into
+    # the (empty) full-size image, instead of blurring and compositing the whole frame
+    kanji_box = draw.textbbox((kanji_x, kanji_y), kanji_text, font=kanji_font)
+    romaji_box = draw.textbbox((romaji_x, romaji_y), ward_info["romaji"], font=romaji_font)
+    margin = max(shadow_offset) + 4 * shadow_blur
+    left = max(math.floor(min(kanji_box[0], romaji_box[0])) - margin, 0)
+    top = max(math.floor(min(kanji_box[1], romaji_box[1])) - margin, 0)
+    right = min(math.ceil(max(kanji_box[2], romaji_box[2])) + margin, width)
+    bottom = min(math.ceil(max(kanji_box[3], romaji_box[3])) + margin, height)
+
+    # Draw the kanji and romaji texts with their shadows
+    title = draw_text_with_shadow(
+        [
+            ((kanji_x - left, kanji_y - top), kanji_text, kanji_font, kanji_color),
+            ((romaji_x - left, romaji_y - top), ward_info["romaji"], romaji_font, romaji_color),
+        ],
         shadow_color,
         shadow_offset,
         shadow_blur,
-        image
+        Image.new("RGBA", (right - left, bottom - top), background_color)
     )
+    image.paste(title, (left, top))
 
     # Save the image
     filename = f"{output_dir}/{ward_info['romaji'].lower()}_ward.png"
@@ -150,8 +161,9 @@ def generate_ward_title(ward_info):
 # Generate titles for all 23 wards
 def generate_all_ward_titles():
     print(f"Generating title images for all 23 Tokyo wards...")
-    for ward in tokyo_wards:
-        generate_ward_title(ward)
+    # Wards are independent renders: one per worker process, each loading the fonts once
+    with ProcessPoolExecutor() as executor:
+        list(executor.map(generate_ward_title, tokyo_wards))
     print(f"All titles generated in the '{output_dir}' directory.")
 
 